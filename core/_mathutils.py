@@ -0,0 +1,37 @@
+# core/_mathutils.py
+import math
+
+from numba import complex64, complex128, float32, float64, njit, vectorize
+
+TWO_PI = 2.0 * math.pi
+INV_TWO_PI = 1.0 / TWO_PI
+
+
+@vectorize([float32(complex64), float64(complex128)], cache=True)
+def abs2(z):
+    """|z|², sans la racine carrée de np.abs(z)"""
+    return z.real * z.real + z.imag * z.imag
+
+
+@vectorize([complex64(float32), complex128(float64)], cache=True)
+def unit_phasor(a):
+    """exp(i·a), calculé directement par cos/sin"""
+    return complex(math.cos(a), math.sin(a))
+
+
+@vectorize([float32(float32), float64(float64)], cache=True)
+def wrap_phase(x):
+    """x ramené dans [0, 2π), sans fmod ni branche"""
+    return x - TWO_PI * math.floor(x * INV_TWO_PI)
+
+
+@njit("float64(float64, float64)", cache=True, fastmath=True)
+def fast_pow(x, e):
+    """x**e, spécialisé pour les exposants usuels (1, 2, 0.5) sans appel à pow"""
+    if e == 1.0:
+        return x
+    if e == 2.0:
+        return x * x
+    if e == 0.5:
+        return math.sqrt(x)
+    return x**e
@@ -1,31 +1,40 @@
 # core/cluster_utils.py
-from collections import deque
 from typing import List
 
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
 from .graph_rp2 import RP2Graph
 
 
 def find_soliton_clusters(
-    graph: RP2Graph, rho: dict, threshold: float
-) -> List[List[int]]:
+    graph: RP2Graph, rho: np.ndarray, threshold: float
+) -> List[np.ndarray]:
     """
     Parcourt le graphe et retourne toutes les composantes connexes
     de nœuds dont rho[i] >= threshold.
     """
-    visited = set()
-    clusters = []
-    for i, val in rho.items():
-        if val < threshold or i in visited:
-            continue
-        queue = deque([i])
-        visited.add(i)
-        cluster = []
-        while queue:
-            u = queue.popleft()
-            cluster.append(u)
-            for v in graph.graph.neighbors(u):
-                if v not in visited and rho.get(v, 0.0) >= threshold:
-                    visited.add(v)
-                    queue.append(v)
-        clusters.append(cluster)
-    return clusters
+    num_nodes = len(rho)
+    active = rho >= threshold
+    active_nodes = np.flatnonzero(active)
+    if len(active_nodes) == 0:
+        return []
+
+    # Sous-graphe induit par les nœuds actifs, sur les tableaux CSR du graphe
+    # (construit par copie : graph.indices ne doit jamais être modifié)
+    edge_keep = active[graph.edge_src] & active[graph.indices]
+    adjacency = csr_matrix(
+        (
+            np.ones(np.count_nonzero(edge_keep), dtype=np.int8),
+            (graph.edge_src[edge_keep], graph.indices[edge_keep]),
+        ),
+        shape=(num_nodes, num_nodes),
+    )
+    _, labels = connected_components(adjacency, directed=False)
+
+    # Regroupement des nœuds actifs par étiquette de composante
+    active_labels = labels[active_nodes]
+    order = np.argsort(active_labels, kind="stable")
+    boundaries = np.flatnonzero(np.diff(active_labels[order])) + 1
+    return np.split(active_nodes[order], boundaries)
@@ -1,11 +1,14 @@
-import cmath
 import math
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict
 
+import numba
+import numpy as np
+
 from core.cluster_utils import find_soliton_clusters
-from core.metric_effective import compute_g_eff
-from core.montecarlo import metropolis_step
-from core.phase_dynamics import next_twist_step, update_phase_and_rho
+from core.montecarlo import metropolis_step, parallel_launch_is_threadsafe
+from core.phase_dynamics import update_fields_fused
 from core.wb_model import WBModel
 
 
@@ -16,35 +19,28 @@ def step_simulation(model: WBModel, step_id: int, params) -> dict:
     2) Calcul de la métrique effective
     3) Mise à jour de phi & rho (vectorielle + Ω)
     4) Relaxation simple (1 passe)
+       (2 à 4 sont fusionnés dans un seul noyau, cf. update_fields_fused)
+    3bis) Détection des clusters & remboursement (sur les ρ mis à jour)
     5) Retourne les stats pour tracé
     """
 
     # 0) Mise à jour de Lambda_vac UNE SEULE FOIS
-    Phi_Wb = sum(1 for s in model.sigma.values() if s == 1)
-    Lmin = params.get("L_min", 0.2)
-    L0 = params.get("L0", 1.0)
-    kφ = params.get("k_phi", 0.01)
-    model.Lambda_vac = Lmin + (L0 - Lmin) * math.exp(-kφ * Phi_Wb)
+    Phi_Wb = model.num_active
+    lut = params.get("_Lambda_lut")
+    if lut is not None:
+        model.Lambda_vac = float(lut[Phi_Wb])
+    else:
+        Lmin = params.get("L_min", 0.2)
+        L0 = params.get("L0", 1.0)
+        kφ = params.get("k_phi", 0.01)
+        model.Lambda_vac = Lmin + (L0 - Lmin) * math.exp(-kφ * Phi_Wb)
 
     # 1) Flips Monte Carlo
     metropolis_step(model, T=params.get("T_eff", 1.0))
 
-    # 2) Calcul de la métrique effective
-    compute_g_eff(
-        model,
-        alpha=params.get("alpha", 1.0),
-        n=params.get("n_power", 1.0),
-        beta=params.get("beta", 1.0),
-        eps0=params.get("eps0", 1.0),
-        m=params.get("m_power", 1.0),
-        p=params.get("p_power", 1.0),
-    )
-    for _ in range(params.get("twist_steps_per_iter", 5)):
-        for twist in model.graph.graph.nodes:
-            twist = next_twist_step(model, twist)
-
-    # 3) Dynamique de phase & rho
-    update_phase_and_rho(model, c2=params.get("c2", 1.0), c3=params.get("c3", 1.5))
+    # 2) Métrique effective, 3) dynamique de phase & rho et 4) relaxation :
+    # un seul noyau fusionné, deux passes sur le voisinage de chaque nœud
+    update_fields_fused(model, params)
 
     # 3bis) Cluster detection & refund
     # Seuil et facteur à régler dans params
@@ -53,41 +49,43 @@ def step_simulation(model: WBModel, step_id: int, params) -> dict:
     clusters = find_soliton_clusters(model.graph, model.rho, threshold)
     for cluster in clusters:
         # Si cluster actif avant et entièrement inactif maintenant → dissolution
-        was_active = any(model.prev_sigma.get(n, 0) == 1 for n in cluster)
-        now_inactive = all(model.sigma.get(n, 0) != 1 for n in cluster)
+        was_active = np.any(model.prev_sigma[cluster] == 1)
+        now_inactive = np.all(model.sigma[cluster] != 1)
         if was_active and now_inactive:
             # Calcul de l'énergie effective
-            E_sol = sum(model.rho.get(n, 0) for n in cluster)
+            E_sol = float(model.rho[cluster].sum(dtype=np.float64))
             refund = refund_factor * E_sol
             # remboursement
             model.consume_N_pot(-refund)
 
-    # 4) Relaxation simple (1 passe)
-    new_phis = {}
-    for n in model.graph.graph.nodes:
-        if model.sigma.get(n, 0) != 1:
-            continue
-        neighs = [j for j in model.graph.get_neighbors(n) if model.sigma.get(j, 0) == 1]
-        if len(neighs) == 0:
-            continue
-        # moyenne vectorielle
-        vec = sum(cmath.exp(1j * model.phi[j]) for j in neighs)
-        avg_angle = cmath.phase(vec)
-        new_phis[n] = avg_angle
-    for n, angle in new_phis.items():
-        model.phi[n] = angle % (2 * math.pi)
-
     # 5) Retour des statistiques
     stats = {
         "step": step_id,
         "N_pot": model.N_pot,
         "active": Phi_Wb,
         "Lambda_vac": model.Lambda_vac,
-        "mean_rho": sum(model.rho.values()) / len(model.rho),
+        "mean_rho": float(model.rho.mean(dtype=np.float64)),
     }
     return stats
 
 
+def build_Lambda_lut(num_nodes: int, params: Dict[str, Any]) -> np.ndarray:
+    """
+    Précalcule Λ_vac = L_min + (L0 - L_min)·exp(-k_φ·Phi_Wb) pour Phi_Wb = 0..N
+
+    Args:
+        num_nodes: Nombre de nœuds du graphe (valeur maximale de Phi_Wb)
+        params: Paramètres du modèle (L_min, L0, k_phi)
+
+    Returns:
+        Tableau de taille N+1 indexé par Phi_Wb
+    """
+    Lmin = params.get("L_min", 0.2)
+    L0 = params.get("L0", 1.0)
+    kφ = params.get("k_phi", 0.01)
+    return Lmin + (L0 - Lmin) * np.exp(-kφ * np.arange(num_nodes + 1))
+
+
 def run_simulation(
     model, num_steps=100, num_mc_sweeps=1, callback=None, params: Dict[str, Any] = {}
 ):
@@ -104,6 +102,9 @@ def run_simulation(
     Returns:
         Liste des statistiques pour chaque étape
     """
+    # Table de Λ_vac pour chaque valeur entière possible de Phi_Wb (0..N)
+    params = dict(params, _Lambda_lut=build_Lambda_lut(model.num_nodes, params))
+
     history = []
     for t in range(num_steps):
         # Effectuer plusieurs balayages Monte Carlo si nécessaire
@@ -118,7 +119,93 @@ def run_simulation(
     return history
 
 
+def _split_threads(max_workers: int):
+    """
+    Répartit les threads Numba entre les chaînes simultanées
+
+    Chaque chaîne lance des noyaux parallèles : n_workers chaînes de
+    n_threads threads chacune n'utilisent pas plus de threads que
+    numba.get_num_threads().
+
+    Args:
+        max_workers: Nombre de chaînes simultanées souhaité
+
+    Returns:
+        (nombre de chaînes simultanées, threads Numba par chaîne)
+    """
+    budget = numba.get_num_threads()
+    n_workers = max(1, min(max_workers, budget))
+    return n_workers, max(1, budget // n_workers)
+
+
+def run_simulation_ensemble(
+    graph,
+    n_chains: int,
+    num_steps: int = 100,
+    config: Dict[str, Any] = None,
+    params: Dict[str, Any] = {},
+    mode: str = "center_A",
+    phi_config: str = "random",
+    max_workers: int = None,
+):
+    """
+    Exécute plusieurs chaînes indépendantes du modèle WB sur un même graphe
+
+    Chaque chaîne a son propre générateur, dérivé de config["seed"] par
+    SeedSequence.spawn : l'ensemble est reproductible et les flux aléatoires
+    sont indépendants. Les chaînes sont exécutées en parallèle dans un pool de
+    threads : les noyaux Numba du pas de simulation relâchent le GIL (nogil).
+    Le balayage Metropolis est lui-même parallèle (prange) : les threads Numba
+    sont répartis entre les chaînes simultanées (cf. _split_threads) pour ne
+    pas surcharger les cœurs. Avec la couche workqueue de Numba, qui ne
+    supporte pas les lancements parallèles concurrents, les chaînes sont
+    exécutées l'une après l'autre. Le résultat ne dépend pas du nombre de
+    threads.
+
+    Args:
+        graph: Graphe RP2 déjà généré (partagé, en lecture seule)
+        n_chains: Nombre de chaînes
+        num_steps: Nombre d'étapes de simulation par chaîne
+        config: Paramètres du modèle (cf. WBModel)
+        params: Paramètres de la dynamique (cf. step_simulation)
+        mode: Configuration initiale de σ
+        phi_config: Configuration initiale de φ
+        max_workers: Nombre maximal de chaînes simultanées (par défaut
+            min(n_chains, nombre de cœurs)), borné par le nombre de threads Numba
+
+    Returns:
+        (liste des modèles, liste des historiques de statistiques)
+    """
+    seed = config.get("seed") if isinstance(config, dict) else None
+    models = []
+    for seq in np.random.SeedSequence(seed).spawn(n_chains):
+        model = WBModel(graph, config)
+        model.rng = np.random.default_rng(seq)
+        model.initialize_fields(mode=mode, phi_config=phi_config)
+        models.append(model)
+
+    def run_chain(model):
+        return run_simulation(model, num_steps=num_steps, params=params)
+
+    if max_workers is None:
+        max_workers = min(n_chains, os.cpu_count() or 1)
+    n_workers, n_threads = _split_threads(min(max_workers, n_chains))
+    if n_workers <= 1 or not parallel_launch_is_threadsafe():
+        histories = [run_chain(model) for model in models]
+    else:
+
+        def run_chain_in_worker(model):
+            # Nombre de threads Numba propre au thread appelant
+            numba.set_num_threads(n_threads)
+            return run_chain(model)
+
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            histories = list(pool.map(run_chain_in_worker, models))
+    return models, histories
+
+
 def calculate_order_parameters(model):
-    active = sum(1 for s in model.sigma.values() if s == 1)
-    mean_rho = sum(model.rho.values()) / len(model.rho)
-    return {"active": active, "mean_rho": mean_rho}
+    active = model.num_active
+    mean_rho = float(model.rho.mean(dtype=np.float64))
+    coherence = model.get_coherence()
+    return {"active": active, "mean_rho": mean_rho, "coherence": coherence}
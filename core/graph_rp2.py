@@ -26,6 +26,8 @@ class RP2Graph:
         """
         self.radius = radius
         self.scale_factor = scale_factor
+        # Graphe NetworkX : construction, dessin et export JSON.
+        # Les boucles chaudes passent par les tableaux CSR ci-dessous.
         self.graph = nx_.Graph()
         self.node_map_2d_to_1d: Dict[Tuple[int, int], int] = (
             {}
@@ -34,6 +36,29 @@ class RP2Graph:
             {}
         )  # Positions pour le dessin
         self.antipode_map: Dict[int, int] = {}  # Mapping des nœuds vers leurs antipodes
+        self.node_ids = np.empty(0, dtype=np.int64)  # ordre d'itération de graph.nodes
+        self.coords = np.empty((0, 2), dtype=np.int64)  # coordonnées (x,y) par nœud
+        self.pos = np.empty((0, 2), dtype=np.float64)  # positions de dessin par nœud
+        # antipode par nœud (-1 si aucun)
+        self.antipode_ids = np.empty(0, dtype=np.int64)
+
+        # Invariants topologiques, calculés une fois dans generate()
+        self._euler: Optional[int] = None
+        self._non_orient: Optional[bool] = None
+
+        # Liste d'adjacence au format CSR (construite dans generate())
+        # Les voisins du nœud i sont indices[indptr[i]:indptr[i + 1]]
+        self.indptr = np.zeros(1, dtype=np.int32)
+        self.indices = np.empty(0, dtype=np.int32)
+        self.is_ts_edge = np.empty(0, dtype=bool)  # aligné sur indices
+        self.edge_src = np.empty(0, dtype=np.int32)  # nœud source de chaque demi-arête
+
+        # Coloration propre du graphe : deux voisins n'ont jamais la même couleur
+        self.node_color = np.empty(0, dtype=np.int8)
+        self.color_classes: List[np.ndarray] = []  # nœuds (int32) de chaque couleur
+        # Mêmes classes à plat : la couleur c occupe color_nodes[color_ptr[c]:color_ptr[c + 1]]
+        self.color_nodes = np.empty(0, dtype=np.int32)
+        self.color_ptr = np.zeros(1, dtype=np.int32)
 
     def generate(self) -> nx_.Graph:
         """
@@ -51,15 +76,18 @@ class RP2Graph:
         # Étape 2: Identification des nœuds antipodaux et création des liens TS
         self._apply_antipodal_identification()
 
-        # Calcul des propriétés topologiques pour validation
-        self._calculate_euler_characteristic()
+        # Étape 3: Matérialisation de la liste d'adjacence CSR pour les boucles chaudes
+        self._build_csr()
+        self._build_coloring()
+
+        # Calcul des propriétés topologiques pour validation (mises en cache)
+        self._euler = self._calculate_euler_characteristic()
+        self._non_orient = self.check_non_orientability()
 
         print(
             f"Graphe RP2 généré avec {self.graph.number_of_nodes()} nœuds et {self.graph.number_of_edges()} liens"
         )
-        print(
-            f"Nombre de liens TS: {sum(1 for _, _, d in self.graph.edges(data=True) if d.get('is_ts', False))}"
-        )
+        print(f"Nombre de liens TS: {int(np.count_nonzero(self.is_ts_edge)) // 2}")
 
         return self.graph
 
@@ -70,73 +98,159 @@ class RP2Graph:
         Utilise des coordonnées cubiques (x,y,z)
         où x+y+z=0 pour la grille hexagonale
         """
-        node_idx = 0
-
-        # Parcours de la grille dans les limites du rayon
-        for x in range(-self.radius, self.radius + 1):
-            for y in range(-self.radius, self.radius + 1):
-                # Condition pour un patch hexagonal: |x| + |y| + |x+y| ≤ 2*radius
-                if abs(x) + abs(y) + abs(x + y) <= 2 * self.radius:
-                    # Ajout du nœud avec ses coordonnées
-                    self.node_map_2d_to_1d[(x, y)] = node_idx
-
-                    # Position pour le dessin (décalage pour les rangées impaires)
-                    # Utilise les coordonnées cubiques pour un rendu hexagonal correct
-                    pos_x = (x + y / 2) * self.scale_factor
-                    pos_y = y * np.sqrt(3) / 2 * self.scale_factor
-                    self.pos_for_drawing[node_idx] = (pos_x, pos_y)
-
-                    # Ajout du nœud avec ses attributs
-                    self.graph.add_node(
-                        node_idx, pos=(pos_x, pos_y), coords=(x, y), antipode=None
-                    )
-                    node_idx += 1
+        R = self.radius
+
+        # Grille complète, filtrée par la condition du patch hexagonal:
+        # |x| + |y| + |x+y| ≤ 2*radius (x varie le plus lentement, comme la double boucle)
+        xs, ys = np.meshgrid(np.arange(-R, R + 1), np.arange(-R, R + 1), indexing="ij")
+        mask = np.abs(xs) + np.abs(ys) + np.abs(xs + ys) <= 2 * R
+        self.coords = np.stack([xs[mask], ys[mask]], axis=1)
+        num_nodes = len(self.coords)
+        node_ids = np.arange(num_nodes)
+        self.node_ids = node_ids
+
+        # Index 2D -> 1D sous forme de grille (-1 hors du patch)
+        self._idx_grid = np.full((2 * R + 1, 2 * R + 1), -1, dtype=np.int64)
+        self._idx_grid[self.coords[:, 0] + R, self.coords[:, 1] + R] = node_ids
+
+        # Position pour le dessin (décalage pour les rangées impaires)
+        # Utilise les coordonnées cubiques pour un rendu hexagonal correct
+        x, y = self.coords[:, 0], self.coords[:, 1]
+        pos_x = (x + y / 2) * self.scale_factor
+        pos_y = y * np.sqrt(3) / 2 * self.scale_factor
+        self.pos = np.stack([pos_x, pos_y], axis=1)
+
+        coords_list = list(map(tuple, self.coords.tolist()))
+        pos_list = list(map(tuple, self.pos.tolist()))
+        self.node_map_2d_to_1d = dict(zip(coords_list, range(num_nodes)))
+        self.pos_for_drawing = dict(enumerate(pos_list))
+
+        # Ajout des nœuds avec leurs attributs
+        self.graph.add_nodes_from(
+            (i, {"pos": pos_list[i], "coords": coords_list[i], "antipode": None})
+            for i in range(num_nodes)
+        )
 
         # Création des liens entre les nœuds adjacents (sans les liens TS pour l'instant)
-        for (x, y), node_idx in self.node_map_2d_to_1d.items():
-            # Définition des 6 voisins hexagonaux
-            neighbors = [
-                (x + 1, y),
-                (x - 1, y),  # Droite, Gauche
-                (x, y + 1),
-                (x, y - 1),  # Haut-Droite, Bas-Gauche
-                (x + 1, y - 1),
-                (x - 1, y + 1),  # Bas-Droite, Haut-Gauche
+        # Définition des 6 voisins hexagonaux
+        shifts = np.array(
+            [
+                (1, 0),
+                (-1, 0),  # Droite, Gauche
+                (0, 1),
+                (0, -1),  # Haut-Droite, Bas-Gauche
+                (1, -1),
+                (-1, 1),  # Bas-Droite, Haut-Gauche
             ]
-
-            # Ajout des liens avec les voisins qui existent dans le patch
-            for nx, ny in neighbors:
-                if (nx, ny) in self.node_map_2d_to_1d:
-                    neighbor_idx = self.node_map_2d_to_1d[(nx, ny)]
-                    # NetworkX ignore automatiquement les doublons d'arêtes
-                    self.graph.add_edge(node_idx, neighbor_idx, is_ts=False)
+        )
+        nbr_x = x[:, None] + shifts[:, 0]
+        nbr_y = y[:, None] + shifts[:, 1]
+        inside = (np.abs(nbr_x) <= R) & (np.abs(nbr_y) <= R)
+        nbr_ids = np.full(nbr_x.shape, -1, dtype=np.int64)
+        nbr_ids[inside] = self._idx_grid[nbr_x[inside] + R, nbr_y[inside] + R]
+
+        # Ajout des liens avec les voisins qui existent dans le patch, une seule
+        # fois par paire (nid > node) ; l'ordre nœud puis direction est conservé
+        valid = nbr_ids > node_ids[:, None]
+        src = np.broadcast_to(node_ids[:, None], nbr_ids.shape)[valid]
+        self.graph.add_edges_from(
+            zip(src.tolist(), nbr_ids[valid].tolist()), is_ts=False
+        )
 
     def _apply_antipodal_identification(self) -> None:
         """
         Applique l'identification antipodale: (x,y) ~ (-x,-y)
         Crée les liens TS (topologiquement sensibles)
         """
-        # Identification des nœuds antipodaux
-        for (x, y), node_idx in list(self.node_map_2d_to_1d.items()):
-            antipode_coords = (-x, -y)
+        R = self.radius
+
+        # Identification des nœuds antipodaux, par lecture vectorisée de la grille d'index
+        antipode_ids = self._idx_grid[R - self.coords[:, 0], R - self.coords[:, 1]]
+
+        # Vérifie si l'antipode existe dans le patch
+        self.antipode_ids = antipode_ids
+        has_antipode = antipode_ids >= 0
+        node_ids = np.flatnonzero(has_antipode)
+        antipode_ids = antipode_ids[has_antipode]
+
+        # Enregistre l'antipode dans le dictionnaire et dans les attributs des nœuds
+        self.antipode_map = dict(zip(node_ids.tolist(), antipode_ids.tolist()))
+        nx_.set_node_attributes(self.graph, self.antipode_map, "antipode")
+
+        # Crée un lien TS entre chaque nœud et son antipode (une fois par paire,
+        # sans boucle sur le centre). Deux antipodes ne sont jamais voisins
+        # sur le patch : (2x, 2y) n'est pas un décalage hexagonal unitaire.
+        first = node_ids < antipode_ids
+        self.graph.add_edges_from(
+            zip(node_ids[first].tolist(), antipode_ids[first].tolist()), is_ts=True
+        )
+
+    def _build_csr(self) -> None:
+        """
+        Construit la représentation CSR (indptr, indices, is_ts_edge, edge_src) du graphe
+
+        Les identifiants de nœuds étant contigus (0..N-1), les champs du modèle
+        peuvent être indexés directement par ces tableaux.
+        """
+        num_nodes = self.graph.number_of_nodes()
+
+        # Un seul parcours des liens, puis chaque lien est dédoublé en deux demi-arêtes
+        edges = np.array(
+            list(self.graph.edges(data="is_ts", default=False)), dtype=np.int64
+        ).reshape(-1, 3)
+        src = np.concatenate([edges[:, 0], edges[:, 1]])
+        dst = np.concatenate([edges[:, 1], edges[:, 0]])
+        is_ts = np.concatenate([edges[:, 2], edges[:, 2]]).astype(bool)
+
+        # Tri par nœud source, voisins par identifiant croissant dans chaque segment
+        order = np.lexsort((dst, src))
+        self.indices = dst[order].astype(np.int32)
+        self.is_ts_edge = is_ts[order]
+        self.edge_src = src[order].astype(np.int32)
+        self.indptr = np.zeros(num_nodes + 1, dtype=np.int32)
+        self.indptr[1:] = np.cumsum(np.bincount(src, minlength=num_nodes))
+
+    def _build_coloring(self) -> None:
+        """
+        Calcule une coloration gloutonne du graphe (liens TS compris)
 
-            # Vérifie si l'antipode existe dans le patch
-            if antipode_coords in self.node_map_2d_to_1d:
-                antipode_idx = self.node_map_2d_to_1d[antipode_coords]
+        Les nœuds d'une même classe de couleur sont deux à deux non voisins :
+        ils peuvent être mis à jour ensemble lors d'un balayage Monte Carlo.
+        """
+        coloring = nx_.coloring.greedy_color(self.graph, strategy="largest_first")
+        num_nodes = self.graph.number_of_nodes()
+        self.node_color = np.array(
+            [coloring[n] for n in range(num_nodes)], dtype=np.int8
+        )
+        num_colors = int(self.node_color.max()) + 1 if num_nodes > 0 else 0
+        self.color_nodes = np.argsort(self.node_color, kind="stable").astype(np.int32)
+        self.color_ptr = np.zeros(num_colors + 1, dtype=np.int32)
+        counts = np.bincount(self.node_color, minlength=num_colors)
+        self.color_ptr[1:] = np.cumsum(counts)
+        self.color_classes = []
+        for c in range(num_colors):
+            lo, hi = self.color_ptr[c], self.color_ptr[c + 1]
+            self.color_classes.append(self.color_nodes[lo:hi])
+
+    def neighbor_sum(self, edge_values: np.ndarray) -> np.ndarray:
+        """
+        Somme, pour chaque nœud, des valeurs portées par ses demi-arêtes CSR
 
-                # Enregistre l'antipode dans les attributs du nœud
-                self.graph.nodes[node_idx]["antipode"] = antipode_idx
-                self.graph.nodes[antipode_idx]["antipode"] = node_idx
+        Args:
+            edge_values: Tableau numérique aligné sur indices
 
-                # Enregistre l'antipode dans le dictionnaire
-                self.antipode_map[node_idx] = antipode_idx
-                self.antipode_map[antipode_idx] = node_idx
+        Returns:
+            Tableau de taille N (0 pour les nœuds sans voisin)
+        """
+        starts = self.indptr[:-1]
+        sums = np.zeros(len(starts), dtype=edge_values.dtype)
 
-                # Crée un lien TS entre le nœud et son antipode
-                if node_idx != antipode_idx and not self.graph.has_edge(
-                    node_idx, antipode_idx
-                ):
-                    self.graph.add_edge(node_idx, antipode_idx, is_ts=True)
+        # reduceat uniquement sur les segments non vides : un segment vide
+        # (notamment en fin de tableau) tronquerait le segment qui le précède
+        nonempty = starts != self.indptr[1:]
+        if nonempty.any():
+            sums[nonempty] = np.add.reduceat(edge_values, starts[nonempty])
+        return sums
 
     def _calculate_euler_characteristic(self) -> int:
         """
@@ -191,32 +305,45 @@ class RP2Graph:
         Returns:
             True si le lien est TS, False sinon
         """
-        if self.graph.has_edge(node1, node2):
-            return self.graph[node1][node2].get("is_ts", False)
-        return False
+        sl = slice(self.indptr[node1], self.indptr[node1 + 1])
+        return bool(np.any(self.is_ts_edge[sl] & (self.indices[sl] == node2)))
 
-    def get_neighbors(self, node: int, kind: str = "all") -> List[int]:
+    def get_neighbors(self, node: int, kind: str = "all") -> np.ndarray:
         """
         Retourne les voisins d'un nœud, avec possibilité de filtrer par type de lien
 
+        Lit directement la tranche CSR du nœud (vue sans copie pour "all").
+
         Args:
             node: Identifiant du nœud
             kind: Type de voisins à retourner ("all", "normal", "ts")
 
         Returns:
-            Liste des identifiants des voisins
+            Tableau des identifiants des voisins
         """
+        sl = slice(self.indptr[node], self.indptr[node + 1])
         if kind == "all":
-            return list(self.graph.neighbors(node))
+            return self.indices[sl]
         elif kind == "normal":
-            return [n for n in self.graph.neighbors(node) if not self.is_ts(node, n)]
+            return self.indices[sl][~self.is_ts_edge[sl]]
         elif kind == "ts":
-            return [n for n in self.graph.neighbors(node) if self.is_ts(node, n)]
+            return self.indices[sl][self.is_ts_edge[sl]]
         else:
             raise ValueError(
                 f"Type de voisins inconnu: {kind}. Utiliser 'all', 'normal' ou 'ts'."
             )
 
+    def get_edge_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Retourne les liens du graphe sous forme de tableaux, lus dans le CSR
+
+        Returns:
+            (u, v, is_ts) : extrémités (u < v) et type de chaque lien
+        """
+        # Chaque lien apparaît deux fois dans le CSR : on garde la demi-arête u < v
+        keep = self.edge_src < self.indices
+        return self.edge_src[keep], self.indices[keep], self.is_ts_edge[keep]
+
     def get_ts_links(self) -> List[Tuple[int, int]]:
         """
         Retourne tous les liens TS du graphe
@@ -224,9 +351,8 @@ class RP2Graph:
         Returns:
             Liste des paires de nœuds formant des liens TS
         """
-        return [
-            (u, v) for u, v, d in self.graph.edges(data=True) if d.get("is_ts", False)
-        ]
+        u, v, is_ts = self.get_edge_arrays()
+        return list(zip(u[is_ts].tolist(), v[is_ts].tolist()))
 
     def antipode(self, node: int) -> Optional[int]:
         """
@@ -247,27 +373,32 @@ class RP2Graph:
         Returns:
             True si le graphe est non-orientable
         """
-        # Une boucle non-triviale est une boucle qui traverse un nombre impair de liens TS
-        # Cherche des chemins simples entre un nœud et son antipode
-        for node, antipode_node in self.antipode_map.items():
-            if node < antipode_node:  # Évite de compter deux fois
-                try:
-                    # Cherche un chemin entre le nœud et son antipode
-                    path = nx_.shortest_path(self.graph, node, antipode_node)
-
-                    # Compte le nombre de liens TS dans le chemin
-                    ts_count = sum(
-                        1
-                        for i in range(len(path) - 1)
-                        if self.is_ts(path[i], path[i + 1])
-                    )
-
-                    # Si nombre impair de liens TS, c'est une boucle non-triviale
-                    if ts_count % 2 == 1:
-                        print(f"Boucle non-triviale trouvée: {path}")
+        # Une boucle non-triviale est une boucle qui traverse un nombre impair de liens TS.
+        # Parcours en largeur sur les tableaux CSR en propageant la parité du nombre
+        # de liens TS traversés : une contradiction révèle une telle boucle.
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        is_ts_edge = self.is_ts_edge.tolist()
+        parity = [-1] * (len(indptr) - 1)
+
+        for root in range(len(parity)):
+            if parity[root] >= 0:
+                continue
+            parity[root] = 0
+            queue = [root]
+            head = 0
+            while head < len(queue):
+                u = queue[head]
+                head += 1
+                for e in range(indptr[u], indptr[u + 1]):
+                    v = indices[e]
+                    p = parity[u] ^ is_ts_edge[e]
+                    if parity[v] < 0:
+                        parity[v] = p
+                        queue.append(v)
+                    elif parity[v] != p:
+                        print(f"Boucle non-triviale trouvée via le lien ({u}, {v})")
                         return True
-                except nx_.NetworkXNoPath:
-                    continue
 
         return False
 
@@ -278,19 +409,23 @@ class RP2Graph:
         Args:
             path: Chemin du fichier de sortie
         """
+        # Lecture directe des tableaux de positions et du CSR (sans NetworkX)
+        x, y = self.pos[:, 0].tolist(), self.pos[:, 1].tolist()
+        antipodes = self.antipode_ids.tolist()
+        u, v, is_ts = self.get_edge_arrays()
         data = {
             "nodes": [
                 {
                     "id": n,
-                    "x": self.graph.nodes[n]["pos"][0],
-                    "y": self.graph.nodes[n]["pos"][1],
-                    "antipode": self.antipode(n),
+                    "x": x[n],
+                    "y": y[n],
+                    "antipode": antipodes[n] if antipodes[n] >= 0 else None,
                 }
-                for n in self.graph.nodes
+                for n in range(len(antipodes))
             ],
             "edges": [
-                {"u": u, "v": v, "is_ts": d.get("is_ts", False)}
-                for u, v, d in self.graph.edges(data=True)
+                {"u": a, "v": b, "is_ts": t}
+                for a, b, t in zip(u.tolist(), v.tolist(), is_ts.tolist())
             ],
         }
 
@@ -299,24 +434,33 @@ class RP2Graph:
 
         print(f"Graphe exporté au format JSON: {path}")
 
-    def get_statistics(self) -> Dict[str, Union[int, float, bool]]:
+    def get_statistics(
+        self, recompute: bool = False
+    ) -> Dict[str, Union[int, float, bool]]:
         """
         Retourne des statistiques sur le graphe
 
+        Args:
+            recompute: Recalculer les invariants topologiques au lieu
+                de renvoyer les valeurs mises en cache par generate()
+
         Returns:
             Dictionnaire de statistiques
         """
+        if recompute or self._euler is None:
+            self._euler = self._calculate_euler_characteristic()
+            self._non_orient = self.check_non_orientability()
+
         num_nodes = self.graph.number_of_nodes()
         num_edges = self.graph.number_of_edges()
-        num_ts_links = sum(
-            1 for _, _, d in self.graph.edges(data=True) if d.get("is_ts", False)
-        )
+        # Chaque lien TS apparaît deux fois dans le CSR
+        num_ts_links = int(np.count_nonzero(self.is_ts_edge)) // 2
 
         return {
             "num_nodes": num_nodes,
             "num_edges": num_edges,
             "num_ts_links": num_ts_links,
             "ts_ratio": num_ts_links / num_edges if num_edges > 0 else 0,
-            "euler_characteristic": self._calculate_euler_characteristic(),
-            "is_non_orientable": self.check_non_orientability(),
+            "euler_characteristic": self._euler,
+            "is_non_orientable": self._non_orient,
         }
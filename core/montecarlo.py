@@ -1,43 +1,253 @@
 import math
-import random
 
+import numba
+import numpy as np
+from numba import njit, prange
+
+from core import wb_model
 from core.wb_model import WBModel
 
 RHO_SOLITON_THRESHOLD = 0.6  # ρ au-dessus = on considère soliton
 SOLITON_REFUND_FACTOR = 0.2  # fraction de ρ remboursée à la dissolution
 
 
-def metropolis_step(model: WBModel, T: float = 1.0):
-    nodes = list(model.graph.graph.nodes)
-    random.shuffle(nodes)
-    for n in nodes:
-        # Enlever la condition d'arrêt quand N_pot est nul pour permettre les transitions A→P
-        # qui vont recharger le réservoir
+@njit("float64(int8, float32, float64)", cache=True, fastmath=True)
+def _flip_cost(sigma_n, rho_n, Λ_vac):
+    """
+    Coût en N_pot du flip d'un nœud (négatif = remboursement)
 
-        dE = model.delta_energy_flip(n)
+    Args:
+        sigma_n: État actuel du nœud (-1 : P→A, 1 : A→P)
+        rho_n: Densité actuelle du nœud
+        Λ_vac: Valeur courante de Λ_vac
+
+    Returns:
+        Coût à consommer sur N_pot si le flip est accepté
+    """
+    if sigma_n == -1:  # P→A (actualisation)
         # Λ_vac influence P→A : plus Λ bas, moins de flips
+        return 1.0 * Λ_vac  # Coût positif
+    # A→P (désactualisation)
+    # Option plus fine : rendre proportionnel à ρ
+    if rho_n >= RHO_SOLITON_THRESHOLD:
+        # remboursement proportionnel à la densité du soliton
+        return -SOLITON_REFUND_FACTOR * rho_n
+    return 0.0
+
 
-        Λ_vac = model.Lambda_vac
+@njit(
+    "Tuple((int64, int64))(int8[:], int8[:], float32[:], complex64[:], int32[:], "
+    "int32[:], boolean[:], int32[:], int64, int64, float64[:], float64[:], float64, "
+    "float64, float64, float64)",
+    cache=True,
+    parallel=True,
+    fastmath=True,
+    boundscheck=False,
+    nogil=True,
+)
+def _metropolis_color_kernel(
+    sigma,
+    prev_sigma,
+    rho,
+    expiphi,
+    indptr,
+    indices,
+    is_ts_edge,
+    color_nodes,
+    lo,
+    hi,
+    u,
+    cost,
+    N_pot,
+    N_pot_max,
+    Λ_vac,
+    T,
+):
+    """
+    Essais Metropolis sur une classe de couleur (nœuds deux à deux non voisins
+    color_nodes[lo:hi]), répartis entre les threads par prange.
+    u et cost sont alignés sur color_nodes : un tirage uniforme par nœud, tiré
+    en bloc, et le coût en N_pot de chaque essai (0 si refusé).
+
+    Le noyau ne modifie pas N_pot : tous les threads lisent sa valeur au début
+    de la classe. Les coûts sont écrits par nœud plutôt que sommés dans la
+    boucle parallèle, dont l'ordre de réduction dépendrait du nombre de
+    threads ; l'appelant les somme dans l'ordre de color_nodes.
+
+    Returns:
+        (nombre de flips acceptés, variation du nombre de nœuds actifs)
+    """
+    flips = 0
+    active_delta = 0
+    # Coût P→A identique pour toute la classe (Λ_vac et N_pot y sont constants) :
+    # l'admissibilité est évaluée une seule fois
+    cost_P = _flip_cost(-1, 0.0, Λ_vac)
+    can_afford_P = N_pot >= cost_P
+    # Terme interne de ΔE, lui aussi constant sur la classe
+    DeltaE_effective = wb_model._delta_E_effective(N_pot, N_pot_max)
+    for k in prange(lo, hi):
+        n = color_nodes[k]
+        # Enlever la condition d'arrêt quand N_pot est nul pour permettre les transitions A→P
+        # qui vont recharger le réservoir
 
         # Différencier les coûts selon le type de transition
-        if model.sigma[n] == -1:  # P→A (actualisation)
-            base_cost = 1.0 * Λ_vac  # Coût positif
+        cost[k] = 0.0
+        is_P = sigma[n] == -1
+        if is_P:  # P→A (actualisation)
+            # Réservoir insuffisant : le flip sera refusé, inutile de calculer ΔE
+            if not can_afford_P:
+                continue
+            base_cost = cost_P
         else:  # A→P (désactualisation)
-            # Option plus fine : rendre proportionnel à ρ
-            rho_n = model.rho[n]
-            if rho_n >= RHO_SOLITON_THRESHOLD:
-                # remboursement proportionnel à la densité du soliton
-                base_cost = -SOLITON_REFUND_FACTOR * rho_n
-            else:
-                base_cost = 0.0
-        # Calcul de la probabilité d'acceptation
-        prob = 1.0 if dE < 0 else math.exp(-dE / T)
-
-        # Condition d'acceptation modifiée pour permettre les transitions A→P même si N_pot est bas
-        if random.random() < prob:
-            # Pour P→A, vérifier qu'on a assez de potentiel
-            if model.sigma[n] == -1 and model.N_pot < base_cost:
-                continue  # Pas assez de potentiel pour cette actualisation
-
-            model.apply_flip(n)
-            model.consume_N_pot(base_cost)
+            base_cost = _flip_cost(sigma[n], rho[n], Λ_vac)
+
+        dE = wb_model._delta_energy_flip_at(
+            n, sigma, expiphi, indptr, indices, is_ts_edge, DeltaE_effective
+        )
+        # Probabilité d'acceptation sans branche : exp(0) = 1 quand dE < 0
+        prob = math.exp(-max(dE, 0.0) / T)
+
+        # Pour P→A, l'admissibilité a déjà été vérifiée ; A→P est toujours permis
+        if u[k] < prob:
+            # apply_flip
+            prev_sigma[n] = sigma[n]
+            sigma[n] = -sigma[n]
+            rho[n] = wb_model._rho_single_core(n, sigma, indptr, indices)
+            cost[k] = base_cost
+            flips += 1
+            active_delta += sigma[n]
+    return flips, active_delta
+
+
+@njit(
+    "Tuple((int64, int64, float64))(int8[:], int8[:], float32[:], complex64[:], "
+    "int32[:], int32[:], boolean[:], int32[:], int32[:], int64[:], float64[:], "
+    "float64, float64, float64, float64)",
+    cache=True,
+    boundscheck=False,
+    nogil=True,
+)
+def _metropolis_sweep_kernel(
+    sigma,
+    prev_sigma,
+    rho,
+    expiphi,
+    indptr,
+    indices,
+    is_ts_edge,
+    color_nodes,
+    color_ptr,
+    color_order,
+    u,
+    N_pot,
+    N_pot_max,
+    Λ_vac,
+    T,
+):
+    """
+    Balayage complet : les classes de couleur sont traitées l'une après l'autre,
+    dans l'ordre color_order, N_pot étant mis à jour (et borné comme dans
+    consume_N_pot) entre deux classes. Le coût d'une classe est sommé ici, en
+    série : le résultat ne dépend pas du nombre de threads.
+
+    Returns:
+        (nombre de flips acceptés, variation du nombre de nœuds actifs,
+        nouvelle valeur de N_pot)
+    """
+    flips = 0
+    active_delta = 0
+    cost = np.empty(len(color_nodes))
+    for c in color_order:
+        lo, hi = color_ptr[c], color_ptr[c + 1]
+        color_flips, color_delta = _metropolis_color_kernel(
+            sigma,
+            prev_sigma,
+            rho,
+            expiphi,
+            indptr,
+            indices,
+            is_ts_edge,
+            color_nodes,
+            lo,
+            hi,
+            u,
+            cost,
+            N_pot,
+            N_pot_max,
+            Λ_vac,
+            T,
+        )
+        flips += color_flips
+        active_delta += color_delta
+        N_pot_cost = 0.0
+        for k in range(lo, hi):
+            N_pot_cost += cost[k]
+        N_pot = max(0.0, min(N_pot_max, N_pot - N_pot_cost))
+    return flips, active_delta, N_pot
+
+
+def parallel_launch_is_threadsafe() -> bool:
+    """
+    Indique si les noyaux parallèles (prange) peuvent être lancés depuis plusieurs
+    threads à la fois : vrai pour les couches TBB et OpenMP de Numba, faux pour
+    la couche workqueue (qui interrompt le processus dans ce cas).
+
+    Returns:
+        True si des chaînes peuvent être exécutées dans des threads concurrents
+    """
+    try:
+        layer = numba.threading_layer()
+    except ValueError:
+        # La couche est choisie au premier lancement : lancement à vide du noyau
+        i8, i32 = np.empty(0, dtype=np.int8), np.empty(0, dtype=np.int32)
+        _metropolis_color_kernel(
+            i8,
+            i8,
+            np.empty(0, dtype=np.float32),
+            np.empty(0, dtype=np.complex64),
+            np.zeros(1, dtype=np.int32),
+            i32,
+            np.empty(0, dtype=bool),
+            i32,
+            0,
+            0,
+            np.empty(0),
+            np.empty(0),
+            0.0,
+            1.0,
+            1.0,
+            1.0,
+        )
+        layer = numba.threading_layer()
+    return layer != "workqueue"
+
+
+def metropolis_step(model: WBModel, T: float = 1.0) -> int:
+    """
+    Balayage Metropolis par sous-réseaux, exécuté en un seul appel compilé :
+    les classes de couleur du graphe sont traitées l'une après l'autre,
+    avec un tirage aléatoire en bloc pour tout le balayage.
+
+    L'ordre des classes est tiré au hasard à chaque balayage (ergodicité).
+    """
+    graph = model.graph
+    color_order = model.rng.permutation(len(graph.color_classes)).astype(np.int64)
+    flips, active_delta, model.N_pot = _metropolis_sweep_kernel(
+        model.sigma,
+        model.prev_sigma,
+        model.rho,
+        model.expiphi,
+        graph.indptr,
+        graph.indices,
+        graph.is_ts_edge,
+        graph.color_nodes,
+        graph.color_ptr,
+        color_order,
+        model.rng.random(len(graph.color_nodes)),
+        model.N_pot,
+        model.N_pot_max,
+        model.Lambda_vac,
+        float(T),
+    )
+    model.num_active += active_delta
+    return flips
@@ -1,75 +1,210 @@
 # core/phase_dynamics.py
-import random
+import math
 
 import numpy as np
+from numba import njit
 
+from core._mathutils import abs2, fast_pow, wrap_phase
 
-def next_twist_step(model, i):
+
+# ------------------ noyau fusionné ------------
+# Appelé uniquement depuis _fused_field_kernel : pas d'enveloppe CPython
+@njit(
+    "int32(int64, int64, int32[:], float64[:], float64)",
+    cache=True,
+    fastmath=True,
+    boundscheck=False,
+    no_cpython_wrapper=True,
+)
+def _draw_neighbor(lo, hi, indices, w_cum, target):
     """
-    Retourne un voisin j choisi selon la métrique effective.
+    Tirage pondéré dans le segment CSR [lo, hi) (target ∈ [0, poids total)) :
+    recherche dichotomique du premier poids cumulé strictement supérieur à target
     """
-    neigh = list(model.graph.graph.neighbors(i))
-    # Calculer/collecter les poids
-    weights = []
-    for j in neigh:
-        w_iso = model.g_eff_iso[i]
-        w_aniso = model.g_eff_aniso[i] * model.g_eff_T.get((i, j), 0.0)
-        weights.append(w_iso + w_aniso)
-    # Normaliser
-    total = sum(weights)
-    probs = [w / total for w in weights]
-    # Tirage au sort pondéré
-    return random.choices(neigh, probs)[0]
-
-
-def update_phase_and_rho(model, c2, c3):
+    if hi == lo:
+        return -1
+    a, b = lo, hi - 1
+    while a < b:
+        mid = (a + b) // 2
+        if w_cum[mid] > target:
+            b = mid
+        else:
+            a = mid + 1
+    return indices[a]
+
+
+@njit(
+    "void(int8[:], float32[:], float32[:], complex64[:], int32[:], int32[:], "
+    "float64[:, :], float64, float64, float64, float64, float64, float64, float64, "
+    "float64, float32[:], float32[:], float32[:], int32[:], float32[:], complex64[:], "
+    "float64[:])",
+    cache=True,
+    fastmath=True,
+    boundscheck=False,
+    nogil=True,
+)
+def _fused_field_kernel(
+    sigma,
+    rho,
+    phi,
+    expiphi,
+    indptr,
+    indices,
+    u,
+    alpha,
+    n_pow,
+    beta,
+    eps0,
+    m_pow,
+    p_pow,
+    c2,
+    c3,
+    g_iso,
+    g_aniso,
+    g_T,
+    twists,
+    phi_mid,
+    expiphi_mid,
+    w_cum,
+):
     """
-    Met à jour les phases et les densités en fonction de la dynamique du modèle.
+    Enchaîne la métrique effective, les pas de twist, la dynamique de phase et
+    de densité et la relaxation en deux passes sur le voisinage de chaque nœud.
 
-    Args:
-        model: Le modèle WB
-        c2: Coefficient pour le terme de gradient
-        c3: Coefficient pour le terme de densité
+    Métrique effective du nœud i (demi-arête CSR k = i -> j) :
+      f_i = 1/(1 + alpha * rho_i**n)
+      grad2_i = sum_j (rho_i - rho_j)**2
+      h_i = beta*grad2_i + eps0**2 * rho_i**m * grad2_i**p
+      T_i[j] = (rho_i - rho_j)**2 / (grad2_i + eps0**2)
+
+    Passe 1 : métrique effective, tirages pondérés et nouvelles phases (phi_mid).
+    Passe 2 : nouvelles densités et relaxation, à partir de phi_mid uniquement ;
+    les résultats sont écrits dans rho, phi et expiphi (double tampon).
+    Les poids de tirage f_i + h_i·T_ij sont cumulés une fois par segment CSR
+    dans w_cum (aligné sur indices) ; chaque tirage, dans les deux passes, est
+    une recherche dichotomique dans ce segment.
+
+    u contient les tirages uniformes : une ligne par pas de twist, puis une
+    pour la phase et une pour la densité.
     """
-    # Créer des dictionnaires pour stocker les nouvelles valeurs
-    new_phi = {}
-    new_rho = {}
-
-    # Mise à jour des phases
-    for i in model.graph.graph.nodes:
-        # Récupérer les voisins actifs
-        j = next_twist_step(model, i)
-        if j is None:
-            # Si pas de voisins actifs, garder la même phase
-            new_phi[i] = model.phi.get(i, 0.0)
+    num_nodes = len(sigma)
+    n_twist = u.shape[0] - 2
+    eps2 = eps0 * eps0
+
+    # Passe 1
+    for i in range(num_nodes):
+        lo, hi = indptr[i], indptr[i + 1]
+        rho_i = rho[i]
+
+        # gradient discret
+        grad2 = 0.0
+        for k in range(lo, hi):
+            d = rho_i - rho[indices[k]]
+            grad2 += d * d
+        # isotrope / anisotrope
+        f_i = 1.0 / (1.0 + alpha * fast_pow(rho_i, n_pow))
+        h_i = beta * grad2 + eps2 * fast_pow(rho_i, m_pow) * fast_pow(grad2, p_pow)
+        g_iso[i] = f_i
+        g_aniso[i] = h_i
+
+        # tenseur directionnel par voisin et poids de tirage cumulés
+        denom = grad2 + eps2
+        total = 0.0
+        for k in range(lo, hi):
+            d = rho_i - rho[indices[k]]
+            g_T[k] = d * d / denom
+            total += f_i + h_i * g_T[k]
+            w_cum[k] = total
+
+        # pas de twist
+        for t in range(n_twist):
+            twists[i] = _draw_neighbor(lo, hi, indices, w_cum, u[t, i] * total)
+
+        # dynamique de phase
+        j = _draw_neighbor(lo, hi, indices, w_cum, u[n_twist, i] * total)
+        if j < 0:
+            # Si pas de voisins, garder la même phase
+            phi_mid[i] = phi[i]
         else:
-            # Moyenne vectorielle des e^{i φ_j}
-            vec_sum = np.exp(1j * model.phi.get(j, 0.0))
-            avg_arg = np.angle(vec_sum)
-
-            # Gradient discret sur le graphe
-            grad2 = (model.rho.get(i, 0.0) - model.rho.get(j, 0.0)) ** 2
-            Omega = c3 * model.rho.get(i, 0.0) + c2 * grad2
-
-            # Mettre à jour la phase
-            new_phi[i] = (avg_arg + Omega) % (2 * np.pi)
-
-    # Mise à jour des densités
-    for i in model.graph.graph.nodes:
-        # Récupérer les voisins actifs
-        j = next_twist_step(model, i)
-        if j is None:
-            # Si pas de voisins actifs, densité nulle
-            new_rho[i] = 0.1 if model.sigma.get(i, -1) == -1 else 0.6
+            avg_arg = math.atan2(expiphi[j].imag, expiphi[j].real)
+            d = rho_i - rho[j]
+            Omega = c3 * rho_i + c2 * d * d
+            phi_mid[i] = wrap_phase(avg_arg + Omega)
+        expiphi_mid[i] = complex(math.cos(phi_mid[i]), math.sin(phi_mid[i]))
+
+    # Passe 2
+    for i in range(num_nodes):
+        lo, hi = indptr[i], indptr[i + 1]
+        total = w_cum[hi - 1] if hi > lo else 0.0
+        vec = 0j
+        n_active = 0
+        for k in range(lo, hi):
+            if sigma[indices[k]] == 1:
+                vec += expiphi_mid[indices[k]]
+                n_active += 1
+
+        # densité : carré de la cohérence de phase locale, sur une base sans
+        # branche (0.1 pour P, 0.1 + 0.5 = 0.6 pour A, valeurs exactes en float64)
+        base = 0.1 + 0.25 * (sigma[i] + 1)
+        j = _draw_neighbor(lo, hi, indices, w_cum, u[n_twist + 1, i] * total)
+        if j < 0:
+            rho[i] = base
+        else:
+            rho[i] = base + 0.3 * abs2(expiphi_mid[j])
+
+        # relaxation : moyenne vectorielle des phaseurs des voisins actifs
+        if sigma[i] == 1 and n_active > 0:
+            phi[i] = wrap_phase(math.atan2(vec.imag, vec.real))
+            expiphi[i] = complex(math.cos(phi[i]), math.sin(phi[i]))
         else:
-            # Calculer la cohérence de phase locale
-            vec_sum = np.exp(1j * new_phi.get(j, 0.0))
-            coherence = np.abs(vec_sum)
+            phi[i] = phi_mid[i]
+            expiphi[i] = expiphi_mid[i]
+
+
+def update_fields_fused(model, params) -> np.ndarray:
+    """
+    Métrique effective, pas de twist, dynamique de phase & rho et relaxation
+    en un seul appel au noyau fusionné.
+
+    Args:
+        model: Le modèle WB
+        params: Paramètres du modèle (alpha, n_power, beta, eps0, m_power,
+            p_power, c2, c3, twist_steps_per_iter)
+
+    Returns:
+        Voisins tirés au dernier pas de twist (-1 pour un nœud isolé)
+    """
+    graph = model.graph
+    num_nodes = model.num_nodes
+    twist_steps = params.get("twist_steps_per_iter", 5)
 
-            # La densité est proportionnelle au carré de la cohérence
-            base = 0.1 if model.sigma.get(i, -1) == -1 else 0.6
-            new_rho[i] = base + 0.3 * coherence**2
+    model.g_eff_iso = np.empty(num_nodes, dtype=model.rho.dtype)
+    model.g_eff_aniso = np.empty(num_nodes, dtype=model.rho.dtype)
+    model.g_eff_T_flat = np.empty(len(graph.indices), dtype=model.rho.dtype)
+    twists = np.full(num_nodes, -1, dtype=np.int32)
 
-    # Mettre à jour le modèle
-    model.phi.update(new_phi)
-    model.rho.update(new_rho)
+    _fused_field_kernel(
+        model.sigma,
+        model.rho,
+        model.phi,
+        model.expiphi,
+        graph.indptr,
+        graph.indices,
+        model.rng.random((twist_steps + 2, num_nodes)),
+        float(params.get("alpha", 1.0)),
+        float(params.get("n_power", 1.0)),
+        float(params.get("beta", 1.0)),
+        float(params.get("eps0", 1.0)),
+        float(params.get("m_power", 1.0)),
+        float(params.get("p_power", 1.0)),
+        float(params.get("c2", 1.0)),
+        float(params.get("c3", 1.5)),
+        model.g_eff_iso,
+        model.g_eff_aniso,
+        model.g_eff_T_flat,
+        twists,
+        np.empty_like(model.phi),
+        np.empty_like(model.expiphi),
+        np.empty(len(graph.indices), dtype=np.float64),
+    )
+    return twists
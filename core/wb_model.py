@@ -1,11 +1,129 @@
 from __future__ import annotations
 
 import math
-import random
 from typing import Any, Dict
 
+import numpy as np
 from numba import njit
-from numpy.polynomial.tests.test_laguerre import L0
+
+from core._mathutils import unit_phasor
+
+# Valeur initiale de Λ_vac (= L0 par défaut dans les paramètres de la dynamique)
+LAMBDA_VAC_INITIAL = 1.0
+
+
+# ------------------ noyaux Numba (SoA + CSR) ------------
+@njit(
+    "float64(int64, int8[:], int32[:], int32[:])",
+    cache=True,
+    fastmath=True,
+    boundscheck=False,
+)
+def _rho_single_core(n, sigma, indptr, indices):
+    """ρ dépend de σ et du voisinage actif."""
+    lo, hi = indptr[n], indptr[n + 1]
+    active = 0
+    for k in range(lo, hi):
+        if sigma[indices[k]] == 1:
+            active += 1
+    frac = active / max(1, hi - lo)
+    base = 0.1 if sigma[n] == -1 else 0.6
+    return base + 0.3 * frac
+
+
+# Appelé uniquement depuis d'autres noyaux : pas d'enveloppe CPython
+@njit(
+    "float64(int64, int8[:], complex64[:], int32[:], int32[:], boolean[:])",
+    cache=True,
+    fastmath=True,
+    boundscheck=False,
+    no_cpython_wrapper=True,
+)
+def _delta_energy_core(n, sigma, expiphi, indptr, indices, is_ts_edge):
+    """
+    Variation de l'énergie d'interaction lors du flip de n, lue directement
+    dans la tranche CSR du nœud (sans tableau temporaire de voisins).
+
+    cos(φ_i - φ_j) = Re(e^{iφ_i}·conj(e^{iφ_j})) est lu dans le cache des
+    phaseurs ; un lien TS (décalage de π) change simplement le signe.
+    """
+    sigma_i = sigma[n]
+    z_i = expiphi[n]
+    dE = 0.0
+    for k in range(indptr[n], indptr[n + 1]):
+        j = indices[k]
+        if sigma[j] == 1:
+            z_j = expiphi[j]
+            phase_term = z_i.real * z_j.real + z_i.imag * z_j.imag
+            if is_ts_edge[k]:
+                phase_term = -phase_term
+            before = -1.0 * (1 if sigma_i == 1 else 0) * phase_term
+            after = -1.0 * (1 if -sigma_i == 1 else 0) * phase_term
+            dE += after - before
+    return dE
+
+
+@njit("float64(float64, float64)", cache=True, fastmath=True)
+def _delta_E_effective(N_pot, N_pot_max):
+    """
+    ΔE_effective(N_pot) = ΔE_coeff · (2 · N_pot/N_potmax - 1)
+
+    Ne dépend que du réservoir : à calculer une fois tant que N_pot ne change pas.
+    """
+    DeltaE_coeff = 3.5  # Valeur par défaut, à remplacer par la valeur du config
+
+    # Calcul de ΔE_effective
+    N_pot_ratio = N_pot / max(0.001, N_pot_max)  # Éviter division par zéro
+    return DeltaE_coeff * (2.0 * N_pot_ratio - 1.0)
+
+
+@njit(
+    "float64(int64, int8[:], complex64[:], int32[:], int32[:], boolean[:], float64)",
+    cache=True,
+    fastmath=True,
+    boundscheck=False,
+)
+def _delta_energy_flip_at(
+    n, sigma, expiphi, indptr, indices, is_ts_edge, DeltaE_effective
+):
+    """ΔE du flip de n pour une valeur de ΔE_effective déjà calculée."""
+    # Calcul de l'énergie d'interaction avec les voisins
+    dE_interaction = _delta_energy_core(n, sigma, expiphi, indptr, indices, is_ts_edge)
+
+    # Calcul de l'énergie interne dépendant de N_pot
+    # E_{int,i}(σ_i, N_pot) = E_0 - σ_i · ΔE_effective(N_pot)
+    E0 = 0.0  # Valeur par défaut, à remplacer par la valeur du config
+
+    # Énergie interne avant et après le flip
+    E_internal_before = E0 - sigma[n] * DeltaE_effective
+    E_internal_after = E0 - (-sigma[n]) * DeltaE_effective
+
+    # Variation d'énergie interne
+    dE_internal = E_internal_after - E_internal_before
+
+    # Énergie totale = énergie interne + énergie d'interaction
+    return dE_internal + dE_interaction
+
+
+@njit(
+    "float64(int64, int8[:], complex64[:], int32[:], int32[:], boolean[:], float64, "
+    "float64)",
+    cache=True,
+    fastmath=True,
+    boundscheck=False,
+)
+def _delta_energy_flip(
+    n, sigma, expiphi, indptr, indices, is_ts_edge, N_pot, N_pot_max
+):
+    return _delta_energy_flip_at(
+        n,
+        sigma,
+        expiphi,
+        indptr,
+        indices,
+        is_ts_edge,
+        _delta_E_effective(N_pot, N_pot_max),
+    )
 
 
 class WBModel:
@@ -13,24 +131,39 @@ class WBModel:
 
     def __init__(self, graph: "RP2Graph", config: Dict[str, Any] = None):
         self.graph = graph
-        self.Lambda_vac = L0  # initial
+        self.Lambda_vac = LAMBDA_VAC_INITIAL
+        # Identifiants de nœuds contigus 0..N-1 : ils indexent directement les champs
+        self.num_nodes = graph.graph.number_of_nodes()
         # Paramètres par défaut
         N_pot_max = 1000.0
         N_pot_initial_fraction = 0.8
+        seed = None
 
         # Si config est fourni, utiliser les valeurs du dictionnaire
         if isinstance(config, dict):
-            N_pot_max = config.get("N_pot_max_sites_factor", 10.0) * len(
-                graph.graph.nodes
-            )
+            N_pot_max = config.get("N_pot_max_sites_factor", 10.0) * self.num_nodes
             N_pot_initial_fraction = config.get("N_pot_initial_fraction", 0.8)
+            seed = config.get("seed")
+
+        # Générateur unique (PCG64) pour tous les tirages du modèle ;
+        # les noyaux Numba reçoivent des tirages faits en bloc
+        self.rng = np.random.default_rng(seed)
 
         self.N_pot_max = N_pot_max
         self.N_pot = N_pot_initial_fraction * N_pot_max
-        self.sigma: Dict[int, int] = {}
-        self.phi: Dict[int, float] = {}
-        self.rho: Dict[int, float] = {}
-        self.prev_sigma = dict(self.sigma)
+
+        # Champs stockés en SoA, indexés par l'identifiant (contigu) du nœud.
+        # φ et ρ sont bornés : la simple précision suffit et divise par deux
+        # la bande passante des noyaux ; N_pot et les réductions restent en float64.
+        self.sigma = np.full(self.num_nodes, -1, dtype=np.int8)
+        self.phi = np.zeros(self.num_nodes, dtype=np.float32)
+        self.rho = np.zeros(self.num_nodes, dtype=np.float32)
+        # Cache de e^{i φ}, rafraîchi à chaque écriture de φ
+        self.expiphi = np.ones(self.num_nodes, dtype=np.complex64)
+        # Nombre de nœuds actifs (σ = 1), tenu à jour à chaque flip
+        self.num_active = 0
+        # 0 tant que le nœud n'a jamais flippé
+        self.prev_sigma = np.zeros(self.num_nodes, dtype=np.int8)
 
     # ------------------ INIT ------------------
     def initialize_fields(self, mode: str = "random", phi_config: str = "random"):
@@ -41,21 +174,24 @@ class WBModel:
             mode: Configuration initiale de σ ("all_P", "center_A", "random")
             phi_config: Configuration initiale de φ ("uniform_zero", "random")
         """
-        for n in self.graph.graph.nodes:
-            if mode == "all_P":
-                s = -1
-            elif mode == "center_A":
-                x, y = self.graph.graph.nodes[n]["pos"]
-                s = 1 if x == 0 and y == 0 else -1
-            else:  # 10 % activés aléatoirement
-                s = 1 if random.random() < 0.1 else -1
-            self.sigma[n] = s
-
-            if phi_config == "uniform_zero":
-                self.phi[n] = 0.0
-            else:
-                self.phi[n] = random.uniform(0, math.pi)
-
+        n = self.num_nodes
+        if mode == "all_P":
+            self.sigma[:] = -1
+        elif mode == "center_A":
+            self.sigma[:] = -1
+            center = self.graph.node_map_2d_to_1d.get((0, 0))
+            if center is not None:
+                self.sigma[center] = 1
+        else:  # 10 % activés aléatoirement
+            self.sigma[:] = np.where(self.rng.random(n) < 0.1, 1, -1)
+
+        if phi_config == "uniform_zero":
+            self.phi[:] = 0.0
+        else:
+            self.phi[:] = self.rng.uniform(0, math.pi, n)
+        self.expiphi[:] = unit_phasor(self.phi)
+
+        self.num_active = int(np.count_nonzero(self.sigma == 1))
         self._update_rho_all()
 
     def consume_N_pot(self, delta: float) -> None:
@@ -67,69 +203,48 @@ class WBModel:
         # clamp entre 0 et N_pot_max
         self.N_pot = max(0.0, min(self.N_pot_max, new_val))
 
+    def get_coherence(self) -> float:
+        """
+        Cohérence de phase des nœuds actifs : |⟨e^{iφ}⟩| sur σ = 1
+
+        Réduction unique sur le cache des phaseurs (sans recalcul de exp).
+
+        Returns:
+            Valeur dans [0, 1] (0 s'il n'y a aucun nœud actif)
+        """
+        if self.num_active == 0:
+            return 0.0
+        z = self.expiphi[self.sigma == 1]
+        return float(abs(z.mean(dtype=np.complex128)))
+
     # ------------------ ρ dynamics -------------
     def _rho_single(self, n):
         """ρ dépend de σ et du voisinage actif."""
-        active = sum(1 for j in self.graph.get_neighbors(n) if self.sigma[j] == 1)
-        frac = active / max(1, len(self.graph.get_neighbors(n)))
-        base = 0.1 if self.sigma[n] == -1 else 0.6
-        return base + 0.3 * frac
+        return _rho_single_core(n, self.sigma, self.graph.indptr, self.graph.indices)
 
     def _update_rho_all(self):
-        for n in self.graph.graph.nodes:
-            self.rho[n] = self._rho_single(n)
+        graph = self.graph
+        active = graph.neighbor_sum((self.sigma[graph.indices] == 1).astype(np.int32))
+        frac = active / np.maximum(1, np.diff(graph.indptr))
+        base = np.where(self.sigma == -1, 0.1, 0.6)
+        self.rho[:] = base + 0.3 * frac
 
     # ------------------ ΔE optimisé ------------
-    @staticmethod
-    @njit
-    def _delta_energy_core(sigma_i, sigma_nbrs, phi_i, phi_nbrs, ts_flags):
-        dE = 0.0
-        for k in range(len(sigma_nbrs)):
-            if sigma_nbrs[k] == 1:
-                phase_term = math.cos(
-                    phi_i - phi_nbrs[k] - (math.pi if ts_flags[k] else 0.0)
-                )
-                before = -1.0 * (1 if sigma_i == 1 else 0) * phase_term
-                after = -1.0 * (1 if -sigma_i == 1 else 0) * phase_term
-                dE += after - before
-        return dE
-
     def delta_energy_flip(self, n: int):
-        # Récupération des voisins et de leurs propriétés
-        nbrs = self.graph.get_neighbors(n)
-        sigma_nbrs = [self.sigma[j] for j in nbrs]
-        phi_nbrs = [self.phi[j] for j in nbrs]
-        ts_flags = [self.graph.is_ts(n, j) for j in nbrs]
-
-        # Calcul de l'énergie d'interaction avec les voisins
-        dE_interaction = self._delta_energy_core(
-            self.sigma[n], sigma_nbrs, self.phi[n], phi_nbrs, ts_flags
+        return _delta_energy_flip(
+            n,
+            self.sigma,
+            self.expiphi,
+            self.graph.indptr,
+            self.graph.indices,
+            self.graph.is_ts_edge,
+            self.N_pot,
+            self.N_pot_max,
         )
 
-        # Calcul de l'énergie interne dépendant de N_pot
-        # E_{int,i}(σ_i, N_pot) = E_0 - σ_i · ΔE_effective(N_pot)
-        # ΔE_effective(N_pot) = ΔE_coeff · (2 · N_pot/N_potmax - 1)
-        E0 = 0.0  # Valeur par défaut, à remplacer par la valeur du config
-        DeltaE_coeff = 3.5  # Valeur par défaut, à remplacer par la valeur du config
-
-        # Calcul de ΔE_effective
-        N_pot_ratio = self.N_pot / max(
-            0.001, self.N_pot_max
-        )  # Éviter division par zéro
-        DeltaE_effective = DeltaE_coeff * (2.0 * N_pot_ratio - 1.0)
-
-        # Énergie interne avant et après le flip
-        E_internal_before = E0 - self.sigma[n] * DeltaE_effective
-        E_internal_after = E0 - (-self.sigma[n]) * DeltaE_effective
-
-        # Variation d'énergie interne
-        dE_internal = E_internal_after - E_internal_before
-
-        # Énergie totale = énergie interne + énergie d'interaction
-        return dE_internal + dE_interaction
-
     # ------------------ flips / N_pot ----------
     def apply_flip(self, n: int):
         self.prev_sigma[n] = self.sigma[n]
         self.sigma[n] = -self.sigma[n]
+        self.num_active += 1 if self.sigma[n] == 1 else -1
         self.rho[n] = self._rho_single(n)
@@ -2,6 +2,7 @@
 # Dossier principal : rp2_wb_model/
 
 import json
+import math
 import os
 
 import matplotlib.pyplot as plt
@@ -11,6 +12,7 @@ from core.graph_rp2 import RP2Graph
 from core.wb_model import WBModel
 from utils.exporter import export_to_json
 from utils.logger import Logger
+from utils.snapshot_writer import SnapshotWriter
 from viz.plotter import Plotter
 
 
@@ -63,6 +65,9 @@ def main():
     # Extraction des paramètres de simulation
     num_steps = sim_params.get("num_steps", 100)
     export_interval = sim_params.get("export_interval", 10)
+    # "json" : un fichier step_*.json par export (lu par Godot)
+    # "binary" : tous les exports dans des tableaux .npy (cf. SnapshotWriter)
+    snapshot_format = sim_params.get("snapshot_format", "json")
 
     # Création du graphe RP2
     print(f"\nCréation du graphe RP2 hexagonal (rayon: {radius})...")
@@ -70,7 +75,7 @@ def main():
     graph.generate()
 
     # Vérification de la non-orientabilité (propriété fondamentale de RP²)
-    is_non_orientable = graph.check_non_orientability()
+    is_non_orientable = graph.get_statistics()["is_non_orientable"]
     print(f"Le graphe est non-orientable: {is_non_orientable}")
 
     # Export du graphe au format JSON pour Godot
@@ -96,23 +101,39 @@ def main():
     # Initialisation du logger
     logger = Logger()
 
+    num_mc_sweeps = sim_params.get("num_mc_sweeps", 1)
+    writer = None
+    if snapshot_format == "binary":
+        writer = SnapshotWriter(
+            "outputs/snapshots",
+            graph,
+            math.ceil(num_steps / export_interval) * num_mc_sweeps,
+        )
+
     # Fonction de callback pour enregistrer les statistiques
     def log_callback(model, step, stats):
         logger.record_stats(step, model, stats)
 
-        # Export périodique vers JSON
+        # Export périodique
         if step % export_interval == 0:
-            export_to_json(model, filename=f"outputs/snapshots/step_{step:04d}.json")
+            if writer is not None:
+                writer.write(step, model)
+            else:
+                export_to_json(
+                    model, filename=f"outputs/snapshots/step_{step:04d}.json"
+                )
 
     # Exécution de la simulation
     print(f"\nDémarrage de la simulation ({num_steps} étapes)...")
     history = run_simulation(
         model,
         num_steps=num_steps,
-        num_mc_sweeps=sim_params.get("num_mc_sweeps", 1),
+        num_mc_sweeps=num_mc_sweeps,
         callback=log_callback,
         params=model_params,
     )
+    if writer is not None:
+        writer.close()
 
     # Calcul des paramètres d'ordre finaux
     order_params = calculate_order_parameters(model)
@@ -121,7 +142,7 @@ def main():
         print(f"  {param}: {value:.4f}")
 
     # Export de l'état final
-    export_to_json(model, filename="outputs/final_state.json")
+    export_to_json(model, filename="outputs/final_state.json", indent=True)
 
     # Visualisation
     plotter = Plotter()
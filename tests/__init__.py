@@ -0,0 +1,3 @@
+"""
+Unit tests for the rp2_wb_model package.
+"""
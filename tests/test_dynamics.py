@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+import numba
+import numpy as np
+
+from core import dynamics
+from core.dynamics import _split_threads, run_simulation_ensemble
+from core.graph_rp2 import RP2Graph
+
+
+class SimulationEnsembleTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = RP2Graph(radius=4)
+        cls.graph.generate()
+
+    def _run(self, max_workers):
+        return run_simulation_ensemble(
+            self.graph, 3, num_steps=8, config={"seed": 11}, max_workers=max_workers
+        )
+
+    def test_result_independent_of_worker_count(self):
+        models_seq, hist_seq = self._run(max_workers=1)
+        models_par, hist_par = self._run(max_workers=3)
+        self.assertEqual(hist_seq, hist_par)
+        for a, b in zip(models_seq, models_par):
+            np.testing.assert_array_equal(a.sigma, b.sigma)
+            np.testing.assert_array_equal(a.phi, b.phi)
+            np.testing.assert_array_equal(a.rho, b.rho)
+            self.assertEqual(a.N_pot, b.N_pot)
+
+    def test_chains_are_independent(self):
+        models, _ = self._run(max_workers=3)
+        self.assertFalse(np.array_equal(models[0].phi, models[1].phi))
+
+    def test_split_threads_stays_within_budget(self):
+        budget = numba.get_num_threads()
+        for max_workers in range(1, budget + 3):
+            n_workers, n_threads = _split_threads(max_workers)
+            self.assertGreaterEqual(n_workers, 1)
+            self.assertGreaterEqual(n_threads, 1)
+            self.assertLessEqual(n_workers * n_threads, budget)
+
+    def test_chains_share_the_numba_threads(self):
+        budget = numba.get_num_threads()
+        seen = []
+        run_simulation = dynamics.run_simulation
+
+        def record_threads(*args, **kwargs):
+            seen.append(numba.get_num_threads())
+            return run_simulation(*args, **kwargs)
+
+        with mock.patch.object(dynamics, "run_simulation", record_threads):
+            self._run(max_workers=3)
+        n_workers, _ = _split_threads(3)
+        self.assertEqual(len(seen), 3)
+        self.assertLessEqual(n_workers * max(seen), budget)
+        # Le réglage est propre aux threads du pool
+        self.assertEqual(numba.get_num_threads(), budget)
+
+
+if __name__ == "__main__":
+    unittest.main()
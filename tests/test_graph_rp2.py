@@ -0,0 +1,55 @@
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from core.graph_rp2 import RP2Graph
+
+
+def _graph_from_edges(num_nodes, edges):
+    """Graphe RP2 dont le CSR est construit sur une liste de liens arbitraire"""
+    graph = RP2Graph(radius=1)
+    graph.graph = nx.Graph()
+    graph.graph.add_nodes_from(range(num_nodes))
+    graph.graph.add_edges_from(edges, is_ts=False)
+    graph._build_csr()
+    return graph
+
+
+class NeighborSumTest(unittest.TestCase):
+    def test_trailing_empty_rows(self):
+        graph = RP2Graph(radius=1)
+        graph.indptr = np.array([0, 1, 3, 3], dtype=np.int32)
+        sums = graph.neighbor_sum(np.array([5, 7, 9]))
+        np.testing.assert_array_equal(sums, [5, 16, 0])
+
+    def test_isolated_nodes(self):
+        # Nœuds 0, 2 et 5 isolés, dont le dernier
+        graph = _graph_from_edges(6, [(1, 3), (1, 4), (3, 4)])
+        values = np.arange(1, len(graph.indices) + 1, dtype=np.float64)
+        expected = np.zeros(6)
+        np.add.at(expected, graph.edge_src, values)
+        np.testing.assert_array_equal(graph.neighbor_sum(values), expected)
+
+    def test_complex_values(self):
+        graph = _graph_from_edges(4, [(0, 1), (1, 2)])
+        values = np.exp(1j * np.arange(len(graph.indices))).astype(np.complex64)
+        expected = np.zeros(4, dtype=np.complex64)
+        np.add.at(expected, graph.edge_src, values)
+        np.testing.assert_allclose(graph.neighbor_sum(values), expected)
+
+    def test_no_edges(self):
+        graph = _graph_from_edges(3, [])
+        sums = graph.neighbor_sum(np.empty(0, dtype=np.int32))
+        np.testing.assert_array_equal(sums, [0, 0, 0])
+
+    def test_matches_degree_on_rp2_graph(self):
+        graph = RP2Graph(radius=3)
+        graph.generate()
+        ones = np.ones(len(graph.indices), dtype=np.int32)
+        degrees = np.array([d for _, d in sorted(graph.graph.degree())])
+        np.testing.assert_array_equal(graph.neighbor_sum(ones), degrees)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import tempfile
+import unittest
+
+from utils.logger import Logger
+
+
+class LoggerWriteTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.logger = Logger(log_dir=self._tmp.name, verbose=False)
+
+    def tearDown(self):
+        self.logger._close()
+        self._tmp.cleanup()
+
+    def _lines(self):
+        with open(self.logger.log_file, encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def test_log_after_finalize_reaches_file(self):
+        self.logger.log("avant")
+        self.logger.finalize()
+        self.logger.log("après finalize")
+        lines = self._lines()
+        self.assertTrue(lines[-1].endswith("[INFO] après finalize"))
+        self.assertTrue(any(line.endswith("[INFO] avant") for line in lines))
+
+    def test_log_after_writer_stopped(self):
+        self.logger._close()
+        self.logger.log("thread arrêté", level="WARNING")
+        self.assertTrue(self._lines()[-1].endswith("[WARNING] thread arrêté"))
+
+
+if __name__ == "__main__":
+    unittest.main()
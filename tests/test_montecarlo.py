@@ -0,0 +1,46 @@
+import unittest
+
+import numba
+import numpy as np
+
+from core.graph_rp2 import RP2Graph
+from core.montecarlo import metropolis_step
+from core.wb_model import WBModel
+
+
+class MetropolisSweepTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = RP2Graph(radius=5)
+        cls.graph.generate()
+
+    def _sweeps(self, n_threads, n_sweeps=10):
+        model = WBModel(self.graph, {"seed": 5})
+        model.initialize_fields(mode="random")
+        previous = numba.get_num_threads()
+        numba.set_num_threads(n_threads)
+        try:
+            flips = [metropolis_step(model, T=1.0) for _ in range(n_sweeps)]
+        finally:
+            numba.set_num_threads(previous)
+        return model, flips
+
+    def test_sweep_independent_of_thread_count(self):
+        model_1, flips_1 = self._sweeps(1)
+        model_n, flips_n = self._sweeps(numba.config.NUMBA_NUM_THREADS)
+        self.assertGreater(sum(flips_1), 0)
+        self.assertEqual(flips_1, flips_n)
+        np.testing.assert_array_equal(model_1.sigma, model_n.sigma)
+        np.testing.assert_array_equal(model_1.rho, model_n.rho)
+        self.assertEqual(model_1.N_pot, model_n.N_pot)
+        self.assertEqual(model_1.num_active, model_n.num_active)
+
+    def test_n_pot_stays_in_bounds(self):
+        model, _ = self._sweeps(numba.config.NUMBA_NUM_THREADS)
+        self.assertGreaterEqual(model.N_pot, 0.0)
+        self.assertLessEqual(model.N_pot, model.N_pot_max)
+        self.assertEqual(model.num_active, int(np.count_nonzero(model.sigma == 1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
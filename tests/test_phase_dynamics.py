@@ -0,0 +1,143 @@
+import copy
+import math
+import unittest
+
+import numpy as np
+
+from core.graph_rp2 import RP2Graph
+from core.phase_dynamics import update_fields_fused
+from core.wb_model import WBModel
+
+PARAMS = {
+    "alpha": 0.7,
+    "n_power": 2.0,
+    "beta": 0.3,
+    "eps0": 0.5,
+    "m_power": 0.5,
+    "p_power": 1.3,
+    "c2": 1.0,
+    "c3": 1.5,
+    "twist_steps_per_iter": 3,
+}
+
+
+def _angle_diff(a, b):
+    """Écart entre deux phases, ramené dans [-π, π]"""
+    return np.angle(np.exp(1j * (np.asarray(a, np.float64) - b)))
+
+
+def reference_step(graph, sigma, rho, phi, u, params):
+    """
+    Référence float64 (boucles Python) du pas fusionné, à tirages u imposés
+
+    Returns:
+        (rho, phi, g_iso, g_aniso, g_T, twists) après le pas
+    """
+    indptr, indices = graph.indptr, graph.indices
+    num_nodes = len(sigma)
+    n_twist = u.shape[0] - 2
+    alpha, n_pow = params["alpha"], params["n_power"]
+    beta, eps0 = params["beta"], params["eps0"]
+    m_pow, p_pow = params["m_power"], params["p_power"]
+    c2, c3 = params["c2"], params["c3"]
+
+    g_iso = np.zeros(num_nodes)
+    g_aniso = np.zeros(num_nodes)
+    g_T = np.zeros(len(indices))
+    cum = np.zeros(len(indices))
+    twists = np.full(num_nodes, -1)
+    phi_mid = phi.copy()
+
+    def draw(lo, hi, target):
+        k = lo + np.searchsorted(cum[lo:hi], target, side="right")
+        return indices[min(k, hi - 1)]
+
+    # Passe 1 : métrique effective, tirages et nouvelles phases
+    for i in range(num_nodes):
+        lo, hi = indptr[i], indptr[i + 1]
+        d = rho[i] - rho[indices[lo:hi]]
+        grad2 = float(np.sum(d * d))
+        g_iso[i] = 1.0 / (1.0 + alpha * rho[i] ** n_pow)
+        g_aniso[i] = beta * grad2 + eps0**2 * rho[i] ** m_pow * grad2**p_pow
+        g_T[lo:hi] = d * d / (grad2 + eps0**2)
+        cum[lo:hi] = np.cumsum(g_iso[i] + g_aniso[i] * g_T[lo:hi])
+        if hi == lo:
+            continue
+        total = cum[hi - 1]
+        for t in range(n_twist):
+            twists[i] = draw(lo, hi, u[t, i] * total)
+        j = draw(lo, hi, u[n_twist, i] * total)
+        omega = c3 * rho[i] + c2 * (rho[i] - rho[j]) ** 2
+        phi_mid[i] = (phi[j] + omega) % (2 * math.pi)
+
+    # Passe 2 : densités et relaxation, à partir de phi_mid uniquement
+    new_rho = np.where(sigma == -1, 0.1, 0.6)
+    new_phi = phi_mid.copy()
+    for i in range(num_nodes):
+        lo, hi = indptr[i], indptr[i + 1]
+        if hi == lo:
+            continue
+        j = draw(lo, hi, u[n_twist + 1, i] * cum[hi - 1])
+        new_rho[i] += 0.3 * abs(np.exp(1j * phi_mid[j])) ** 2
+        nbrs = indices[lo:hi]
+        active = nbrs[sigma[nbrs] == 1]
+        if sigma[i] == 1 and len(active) > 0:
+            vec = np.exp(1j * phi_mid[active]).sum()
+            new_phi[i] = math.atan2(vec.imag, vec.real) % (2 * math.pi)
+
+    return new_rho, new_phi, g_iso, g_aniso, g_T, twists
+
+
+class FusedKernelPrecisionTest(unittest.TestCase):
+    """Le noyau float32 reste à 1e-4 d'une référence float64 à tirages identiques"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = RP2Graph(radius=5)
+        cls.graph.generate()
+
+    def _run(self, seed, num_steps):
+        model = WBModel(self.graph, {"seed": seed})
+        model.initialize_fields(mode="random")
+        sigma = model.sigma.copy()
+        rho = model.rho.astype(np.float64)
+        phi = model.phi.astype(np.float64)
+        shape = (PARAMS["twist_steps_per_iter"] + 2, model.num_nodes)
+
+        for _ in range(num_steps):
+            # Mêmes tirages que ceux faits par update_fields_fused
+            u = copy.deepcopy(model.rng).random(shape)
+            twists = update_fields_fused(model, PARAMS)
+            rho, phi, g_iso, g_aniso, g_T, ref_twists = reference_step(
+                self.graph, sigma, rho, phi, u, PARAMS
+            )
+
+            np.testing.assert_array_equal(twists, ref_twists)
+            np.testing.assert_allclose(model.g_eff_iso, g_iso, rtol=0, atol=1e-4)
+            np.testing.assert_allclose(model.g_eff_aniso, g_aniso, rtol=0, atol=1e-4)
+            np.testing.assert_allclose(model.g_eff_T_flat, g_T, rtol=0, atol=1e-4)
+            np.testing.assert_allclose(model.rho, rho, rtol=0, atol=1e-4)
+            self.assertLess(np.abs(_angle_diff(model.phi, phi)).max(), 1e-4)
+            np.testing.assert_allclose(
+                model.expiphi, np.exp(1j * phi), rtol=0, atol=1e-4
+            )
+
+    def test_single_step(self):
+        self._run(seed=1, num_steps=1)
+
+    def test_short_run(self):
+        self._run(seed=2, num_steps=5)
+
+    def test_field_dtypes(self):
+        model = WBModel(self.graph, {"seed": 3})
+        model.initialize_fields(mode="random")
+        update_fields_fused(model, PARAMS)
+        self.assertEqual(model.sigma.dtype, np.int8)
+        self.assertEqual(model.phi.dtype, np.float32)
+        self.assertEqual(model.rho.dtype, np.float32)
+        self.assertEqual(model.expiphi.dtype, np.complex64)
+        self.assertIsInstance(model.N_pot, float)
+
+
+if __name__ == "__main__":
+    unittest.main()
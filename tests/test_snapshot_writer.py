@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from core.graph_rp2 import RP2Graph
+from core.wb_model import WBModel
+from utils.snapshot_writer import SnapshotWriter
+
+
+class SnapshotWriterTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = RP2Graph(radius=3)
+        cls.graph.generate()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.model = WBModel(self.graph, {"seed": 3})
+        self.model.initialize_fields(mode="random")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _load(self, name):
+        return np.load(os.path.join(self._tmp.name, f"{name}.npy"))
+
+    def _write(self, num_snapshots, steps):
+        writer = SnapshotWriter(self._tmp.name, self.graph, num_snapshots)
+        for step in steps:
+            writer.write(step, self.model)
+        return writer
+
+    def test_close_truncates_to_written_snapshots(self):
+        self._write(5, (0, 10)).close()
+        np.testing.assert_array_equal(self._load("step"), [0, 10])
+        self.assertEqual(self._load("sigma").shape, (2, self.model.num_nodes))
+        np.testing.assert_array_equal(self._load("phi")[1], self.model.phi)
+
+    def test_close_twice(self):
+        for num_snapshots in (2, 5):
+            writer = self._write(num_snapshots, (0, 10))
+            writer.close()
+            writer.close()
+            self.assertTrue(writer.closed)
+            np.testing.assert_array_equal(self._load("step"), [0, 10])
+
+
+if __name__ == "__main__":
+    unittest.main()
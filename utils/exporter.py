@@ -1,14 +1,27 @@
 import json
 import os
 
+import numpy as np
 
-def export_to_json(model, filename: str):
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : repli sur le module json standard
+    orjson = None
+
+
+def export_to_json(model, filename: str, indent: bool = False):
     """
     Exporte l'état du modèle WB au format JSON
 
+    Les champs sont convertis en bloc depuis les tableaux du modèle (sans
+    boucle Python par nœud) et sérialisés avec orjson s'il est installé.
+    Les instantanés intermédiaires sont compacts ; l'indentation est réservée
+    à l'état final, destiné à être lu.
+
     Args:
         model: Instance du modèle WB
         filename: Chemin du fichier de sortie
+        indent: Indenter le JSON (2 espaces) pour le rendre lisible
     """
     os.makedirs(os.path.dirname(filename), exist_ok=True)
 
@@ -23,39 +36,56 @@ def export_to_json(model, filename: str):
         )
 
     # Vérifier si le modèle a un attribut rho direct
-    has_rho = hasattr(model, "rho") and model.rho
+    has_rho = hasattr(model, "rho") and len(model.rho) > 0
+    rho = model.rho if has_rho else np.where(model.sigma == 1, 1.0, 0.1)
 
-    data = {
-        "N_pot": float(model.N_pot),
-        "nodes": [
-            {
-                "id": int(n),
-                "sigma": int(model.sigma.get(n, 0)),
-                "phi": float(model.phi.get(n, 0)),
-                "rho": (
-                    float(model.rho.get(n, 0))
-                    if has_rho
-                    else (1.0 if model.sigma.get(n, -1) == 1 else 0.1)
-                ),
-            }
-            for n in graph_attr.nodes
-        ],
-        "edges": [],
-    }
+    # Les identifiants de nœuds sont contigus (0..N-1) : ils indexent les champs.
+    # L'ordre des nœuds est précalculé par RP2Graph, sinon relu dans NetworkX
+    node_ids = getattr(model.graph, "node_ids", None)
+    if node_ids is None:
+        node_ids = np.fromiter(graph_attr.nodes, dtype=np.int64)
+    keys = ("id", "sigma", "phi", "rho")
+    columns = (
+        node_ids.tolist(),
+        model.sigma[node_ids].tolist(),
+        model.phi[node_ids].tolist(),
+        rho[node_ids].tolist(),
+    )
+
+    # Arêtes lues dans le CSR du graphe s'il existe, sinon via NetworkX
+    if hasattr(model.graph, "get_edge_arrays"):
+        u, v, is_ts = model.graph.get_edge_arrays()
+        edges = [
+            {"u": a, "v": b, "is_ts": t}
+            for a, b, t in zip(u.tolist(), v.tolist(), is_ts.tolist())
+        ]
+    else:
+        edges = []
+        for u, v, d in graph_attr.edges(data=True):
+            edge_data = {"u": int(u), "v": int(v)}
 
-    # Ajouter les arêtes avec leurs attributs
-    for u, v, d in graph_attr.edges(data=True):
-        edge_data = {"u": int(u), "v": int(v)}
+            # Ajouter l'attribut is_ts s'il existe
+            if "is_ts" in d:
+                edge_data["is_ts"] = bool(d["is_ts"])
 
-        # Ajouter l'attribut is_ts s'il existe
-        if "is_ts" in d:
-            edge_data["is_ts"] = bool(d["is_ts"])
+            edges.append(edge_data)
 
-        data["edges"].append(edge_data)
+    data = {
+        "N_pot": float(model.N_pot),
+        "nodes": [dict(zip(keys, row)) for row in zip(*columns)],
+        "edges": edges,
+    }
 
     # Écriture dans le fichier JSON
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    if orjson is not None:
+        with open(filename, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0))
+    else:
+        with open(filename, "w", encoding="utf-8") as f:
+            if indent:
+                json.dump(data, f, indent=2)
+            else:
+                json.dump(data, f, separators=(",", ":"))
 
     print(f"État du modèle exporté dans {filename}")
     return filename
@@ -1,27 +1,128 @@
+import atexit
 import json
 import os
+import queue
+import threading
 import time
 from datetime import datetime
 
 import numpy as np
 
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : repli sur le module json standard
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard est optionnel : statistiques finales non compressées
+    zstandard = None
+
+# Message de contrôle demandant au thread d'écriture de vider le fichier
+_FLUSH = object()
+
+# Taille du tampon du fichier de log au-delà de laquelle il est écrit sur disque
+_LOG_BUFFER_SIZE = 1 << 16
+
+# Niveaux de log ; le seuil par défaut peut être fixé par la variable WB_LOG_LEVEL
+_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+# Message de synthèse de record_stats (gabarit %, formaté en C)
+_STEP_FMT = "Étape %d: N_pot=%.2f, Actifs=%d, ρ_moy=%.3f"
+
+# Colonnes de l'historique des statistiques (cf. Logger.stats_array)
+STATS_DTYPE = np.dtype(
+    [
+        ("step", "i8"),
+        ("timestamp", "f8"),
+        ("N_pot", "f8"),
+        ("rho_mean", "f8"),
+        ("rho_std", "f8"),
+        ("sigma_mean", "f8"),
+        ("active_count", "i8"),
+    ]
+)
+
+
+# ------------------ récupération de rho ------------
+def _rho_from_field(model):
+    # Le modèle a un attribut rho explicite
+    return np.asarray(model.rho)
+
+
+def _rho_from_sigma(model):
+    # rho approché à partir de sigma
+    nodes = np.fromiter(model.network, dtype=np.int64)
+    return np.where(np.asarray(model.sigma)[nodes] == 1, 1.0, 0.1)
+
+
+def _rho_from_effective(model):
+    # rho calculé nœud par nœud par get_effective_rho, sinon à partir de sigma
+    try:
+        return np.fromiter(
+            (model.get_effective_rho(node) for node in model.network),
+            dtype=np.float64,
+            count=model.network.number_of_nodes(),
+        )
+    except (AttributeError, TypeError):
+        if hasattr(model, "sigma"):
+            return _rho_from_sigma(model)
+        return np.empty(0)
+
+
+def _no_rho(model):
+    return np.empty(0)
+
+
+def _select_rho_getter(model):
+    """
+    Choisit, une fois pour un modèle donné, la fonction qui fournit ses valeurs de rho
+
+    Args:
+        model: Instance du modèle WB
+
+    Returns:
+        Fonction model -> tableau des valeurs de rho
+    """
+    if hasattr(model, "rho") and len(model.rho) > 0:
+        return _rho_from_field
+    if hasattr(model, "network"):
+        return _rho_from_effective
+    return _no_rho
+
 
 class Logger:
     """
     Gestionnaire de journalisation pour les simulations WB
     """
 
-    def __init__(self, log_dir="outputs/logs", save_interval=10):
+    def __init__(
+        self, log_dir="outputs/logs", save_interval=10, verbose=True, compress=True
+    ):
         """
         Initialise le logger
 
         Args:
             log_dir (str): Répertoire pour les fichiers de log
             save_interval (int): Intervalle entre les sauvegardes automatiques
+            verbose (bool): Recopie les messages sur la console
+            compress (bool): Statistiques finales compressées en zstd
+                (stats_*.json.zst) si zstandard est installé ; sinon JSON indenté
         """
         self.log_dir = log_dir
         self.save_interval = save_interval
+        self.verbose = verbose
+        # Les messages sous ce niveau sont ignorés avant tout formatage
+        self.min_level = _LEVELS.get(
+            os.environ.get("WB_LOG_LEVEL", "INFO").upper(), _LEVELS["INFO"]
+        )
         self.stats = []
+        # Historique en colonnes (tableau structuré agrandi par doublement)
+        self._stats_buf = np.empty(64, dtype=STATS_DTYPE)
+        self._num_stats = 0
+        # Fonction de récupération de rho, choisie au premier appel de record_stats
+        self._rho_model = None
+        self._rho_getter = None
         self.start_time = time.time()
 
         # Création du dossier de logs si nécessaire
@@ -31,39 +132,128 @@ class Logger:
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.log_file = os.path.join(log_dir, f"simulation_{self.timestamp}.log")
         self.stats_file = os.path.join(log_dir, f"stats_{self.timestamp}.json")
+        # Journal incrémental des statistiques (un enregistrement JSON par ligne) ;
+        # le fichier JSON complet n'est écrit qu'une fois, dans finalize()
+        self.stats_jsonl_file = os.path.splitext(self.stats_file)[0] + ".jsonl"
+        self.compress = compress and zstandard is not None
+        if self.compress:
+            self.stats_file += ".zst"
+        self._pending = []
+
+        # Horodatage des messages, reformaté seulement quand la seconde change
+        self._ts_sec = None
+        self._ts_str = ""
+
+        # Fichier de log ouvert une seule fois (descripteur bas niveau, écrit par
+        # os.write depuis un tampon en mémoire) ; les écritures sont faites par un
+        # thread dédié, alimenté par une file bornée : la simulation ne bloque
+        # jamais sur le disque (sauf file pleine)
+        self._fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._buf = bytearray()
+        self._queue = queue.Queue(maxsize=10000)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        atexit.register(self._close)
 
         # Message initial
         self.log("Simulation démarrée")
 
+    def _write_loop(self):
+        """
+        Boucle du thread d'écriture : vide la file dans le fichier de log
+        (None : arrêt, _FLUSH : vidage du tampon)
+        """
+        try:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    break
+                if entry is _FLUSH:
+                    self._flush_buffer()
+                else:
+                    self._buf += entry.encode("utf-8")
+                    self._buf += b"\n"
+                    if len(self._buf) >= _LOG_BUFFER_SIZE:
+                        self._flush_buffer()
+        finally:
+            # Même en cas d'erreur : rien de ce qui a été reçu n'est perdu
+            try:
+                self._flush_buffer()
+            finally:
+                os.close(self._fd)
+
+    def _flush_buffer(self):
+        """
+        Écrit le tampon du thread d'écriture dans le fichier de log
+        """
+        view = memoryview(self._buf)
+        while view:
+            # os.write peut n'écrire qu'une partie des octets
+            written = os.write(self._fd, view)
+            view = view[written:]
+        view.release()
+        self._buf.clear()
+
+    def _close(self):
+        """
+        Arrête le thread d'écriture après les messages en attente (idempotent)
+        """
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
     def log(self, message, level="INFO"):
         """
         Ajoute un message au fichier de log
 
         Args:
             message (str): Message à journaliser
-            level (str): Niveau de log (INFO, WARNING, ERROR)
+            level (str): Niveau de log (DEBUG, INFO, WARNING, ERROR)
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] [{level}] {message}"
+        if _LEVELS.get(level, 20) < self.min_level:
+            return
+
+        now = int(time.time())
+        if now != self._ts_sec:
+            self._ts_sec = now
+            self._ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+        log_entry = f"[{self._ts_str}] [{level}] {message}"
 
         # Affichage console
-        print(log_entry)
+        if self.verbose:
+            print(log_entry)
 
-        # Écriture dans le fichier
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(log_entry + "\n")
+        # Écriture dans le fichier, déléguée au thread d'écriture tant qu'il
+        # tourne ; après finalize() (ou s'il s'est arrêté), écriture directe
+        while self._writer.is_alive():
+            try:
+                self._queue.put(log_entry, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        self._write_direct(log_entry)
 
-    def record_stats(self, step, model, step_stats=None):
+    def _write_direct(self, entry):
         """
-        Enregistre les statistiques de l'étape de simulation
+        Ajoute un message au fichier de log sans passer par le thread d'écriture
+        """
+        fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, entry.encode("utf-8") + b"\n")
+        finally:
+            os.close(fd)
+
+    def compute_stats(self, model):
+        """
+        Calcule les statistiques des champs du modèle (réductions NumPy)
 
         Args:
-            step (int): Numéro de l'étape
             model (WBModel): Instance du modèle WB
-            step_stats (dict, optional): Statistiques supplémentaires
+
+        Returns:
+            dict: Statistiques du réseau, de rho, de sigma et N_pot
         """
-        # Statistiques de base
-        stats = {"step": step, "timestamp": time.time() - self.start_time}
+        stats = {}
 
         # Ajout des statistiques du réseau
         if hasattr(model, "network"):
@@ -74,73 +264,110 @@ class Logger:
                 }
             )
 
-        # Statistiques sur les champs
-        # Récupération des valeurs de rho
-        if hasattr(model, "rho") and model.rho:
-            # Si le modèle a un attribut rho explicite
-            rho_values = list(model.rho.values())
-        else:
-            # Sinon, essayer de calculer rho à partir de get_effective_rho
-            try:
-                if hasattr(model, "network"):
-                    rho_values = [
-                        model.get_effective_rho(node) for node in model.network.nodes()
-                    ]
-                else:
-                    rho_values = []
-            except (AttributeError, TypeError):
-                # Si get_effective_rho n'est pas disponible, utiliser sigma
-                if hasattr(model, "sigma") and hasattr(model, "network"):
-                    rho_values = [
-                        1.0 if model.sigma.get(n, -1) == 1 else 0.1
-                        for n in model.network.nodes()
-                    ]
-                else:
-                    rho_values = []
+        # Statistiques sur les champs, réduites directement sur les tableaux
+        # Récupération des valeurs de rho (méthode choisie une fois par modèle)
+        if model is not self._rho_model:
+            self._rho_model = model
+            self._rho_getter = _select_rho_getter(model)
+        rho_arr = self._rho_getter(model)
 
         # Récupération des valeurs de sigma
-        sigma_values = list(model.sigma.values()) if hasattr(model, "sigma") else []
-
-        # Calcul des statistiques
-        active_count = sum(1 for s in sigma_values if s == 1)
+        sigma_arr = np.asarray(model.sigma) if hasattr(model, "sigma") else np.empty(0)
 
+        # Calcul des statistiques (réductions en float64)
+        has_rho, has_sigma = rho_arr.size > 0, sigma_arr.size > 0
         stats.update(
             {
-                "rho_mean": np.mean(rho_values) if rho_values else 0.0,
-                "rho_std": np.std(rho_values) if rho_values else 0.0,
-                "sigma_sum": sum(sigma_values) if sigma_values else 0,
-                "sigma_mean": np.mean(sigma_values) if sigma_values else 0.0,
-                "active_count": active_count,
+                "rho_mean": float(rho_arr.mean(dtype=np.float64)) if has_rho else 0.0,
+                "rho_std": float(rho_arr.std(dtype=np.float64)) if has_rho else 0.0,
+                "sigma_sum": int(sigma_arr.sum(dtype=np.int64)) if has_sigma else 0,
+                "sigma_mean": (
+                    float(sigma_arr.mean(dtype=np.float64)) if has_sigma else 0.0
+                ),
+                "active_count": int(np.count_nonzero(sigma_arr == 1)),
                 "N_pot": float(model.N_pot) if hasattr(model, "N_pot") else 0.0,
             }
         )
+        return stats
+
+    def record_stats(self, step, model, step_stats=None):
+        """
+        Enregistre les statistiques de l'étape de simulation
+
+        Les statistiques des champs (cf. compute_stats) ne sont calculées que
+        pour les étapes journalisées ou sauvegardées ; pour les autres, seuls
+        l'étape, l'horodatage, N_pot et step_stats sont conservés.
+
+        Args:
+            step (int): Numéro de l'étape
+            model (WBModel): Instance du modèle WB
+            step_stats (dict, optional): Statistiques supplémentaires
+        """
+        will_save = step % self.save_interval == 0
+        will_log = self.min_level <= _LEVELS["INFO"]
+
+        # Statistiques de base
+        stats = {"step": step, "timestamp": time.time() - self.start_time}
+        if will_save or will_log:
+            stats.update(self.compute_stats(model))
+        else:
+            stats["N_pot"] = float(model.N_pot) if hasattr(model, "N_pot") else 0.0
 
         # Ajout des statistiques supplémentaires
         if step_stats:
             stats.update(step_stats)
 
-        # Ajout aux statistiques globales
+        # Ajout aux statistiques globales (le tableau en colonnes ne reçoit que
+        # les étapes dont les statistiques sont complètes)
         self.stats.append(stats)
+        self._pending.append(stats)
+        if will_save or will_log:
+            if self._num_stats == len(self._stats_buf):
+                self._stats_buf = np.resize(self._stats_buf, 2 * len(self._stats_buf))
+            self._stats_buf[self._num_stats] = tuple(
+                stats[k] for k in STATS_DTYPE.names
+            )
+            self._num_stats += 1
 
-        # Log des statistiques principales
-        self.log(
-            f"Étape {step}: N_pot={stats['N_pot']:.2f}, "
-            f"Actifs={stats['active_count']}, "
-            f"ρ_moy={stats['rho_mean']:.3f}"
-        )
+        # Log des statistiques principales (omis au-dessus du niveau INFO)
+        if will_log:
+            self.log(
+                _STEP_FMT
+                % (step, stats["N_pot"], stats["active_count"], stats["rho_mean"])
+            )
 
         # Sauvegarde périodique
-        if step % self.save_interval == 0:
+        if will_save:
             self.save_stats()
 
+    @property
+    def stats_array(self):
+        """
+        Historique des statistiques principales sous forme de tableau structuré
+
+        Returns:
+            np.ndarray de dtype STATS_DTYPE (une ligne par étape journalisée ou
+            sauvegardée par record_stats)
+        """
+        return self._stats_buf[: self._num_stats]
+
     def save_stats(self):
         """
-        Sauvegarde les statistiques dans un fichier JSON
+        Ajoute les statistiques en attente au journal JSONL (écriture groupée)
         """
-        with open(self.stats_file, "w", encoding="utf-8") as f:
-            json.dump(self.stats, f, indent=2)
+        if self._pending:
+            if orjson is not None:
+                option = orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY
+                data = b"".join(orjson.dumps(s, option=option) for s in self._pending)
+            else:
+                data = "".join(json.dumps(s) + "\n" for s in self._pending).encode()
+            with open(self.stats_jsonl_file, "ab", buffering=1 << 20) as f:
+                f.write(data)
+            self._pending = []
 
-        self.log(f"Statistiques sauvegardées dans {self.stats_file}")
+        self.log(f"Statistiques sauvegardées dans {self.stats_jsonl_file}")
+        if self._writer.is_alive():
+            self._queue.put(_FLUSH)
 
     def finalize(self):
         """
@@ -150,6 +377,20 @@ class Logger:
         self.log(f"Simulation terminée. Durée totale: {elapsed_time:.2f} secondes")
         self.save_stats()
 
+        # Fichier JSON complet, écrit une seule fois
+        if self.compress:
+            # JSON compact compressé en zstd (niveau 3)
+            if orjson is not None:
+                data = orjson.dumps(self.stats, option=orjson.OPT_SERIALIZE_NUMPY)
+            else:
+                data = json.dumps(self.stats, separators=(",", ":")).encode()
+            with open(self.stats_file, "wb") as f:
+                f.write(zstandard.ZstdCompressor(level=3).compress(data))
+        else:
+            with open(self.stats_file, "w", encoding="utf-8") as f:
+                json.dump(self.stats, f, indent=2)
+        self.log(f"Statistiques sauvegardées dans {self.stats_file}")
+
         # Résumé final
         if self.stats:
             last_stats = self.stats[-1]
@@ -157,4 +398,5 @@ class Logger:
                 f"Résumé final - Étapes: {last_stats['step']}, Actifs: {last_stats.get('active_count', 0)}, N_pot: {last_stats['N_pot']:.2f}"
             )
 
+        self._close()
         return self.stats_file
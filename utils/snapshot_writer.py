@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+
+
+class SnapshotWriter:
+    """
+    Enregistre les états successifs du modèle WB dans des fichiers binaires
+
+    La topologie (liens, type TS, positions) est écrite une seule fois dans
+    graph.npz ; chaque instantané n'ajoute qu'une ligne aux tableaux
+    step, N_pot, sigma, phi et rho (fichiers .npy projetés en mémoire,
+    lisibles par np.load(..., mmap_mode="r")).
+    """
+
+    def __init__(self, directory: str, graph, num_snapshots: int):
+        """
+        Args:
+            directory: Dossier de sortie
+            graph: Graphe RP2 du modèle (déjà généré)
+            num_snapshots: Nombre maximal d'instantanés à enregistrer
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.count = 0
+        self.closed = False
+
+        # Topologie statique, écrite une fois
+        u, v, is_ts = graph.get_edge_arrays()
+        np.savez(
+            os.path.join(directory, "graph.npz"),
+            edge_u=u,
+            edge_v=v,
+            is_ts=is_ts,
+            pos=graph.pos,
+        )
+
+        num_nodes = len(graph.indptr) - 1
+        self.step = self._open("step", (num_snapshots,), np.int64)
+        self.N_pot = self._open("N_pot", (num_snapshots,), np.float64)
+        self.sigma = self._open("sigma", (num_snapshots, num_nodes), np.int8)
+        self.phi = self._open("phi", (num_snapshots, num_nodes), np.float32)
+        self.rho = self._open("rho", (num_snapshots, num_nodes), np.float32)
+
+    def _open(self, name: str, shape, dtype) -> np.memmap:
+        return np.lib.format.open_memmap(
+            os.path.join(self.directory, f"{name}.npy"),
+            mode="w+",
+            dtype=dtype,
+            shape=shape,
+        )
+
+    def write(self, step: int, model) -> None:
+        """
+        Ajoute l'état courant du modèle comme nouvel instantané
+
+        Args:
+            step: Numéro de l'étape de simulation
+            model: Instance du modèle WB
+        """
+        if self.count >= len(self.step):
+            raise IndexError(f"Nombre maximal d'instantanés atteint ({len(self.step)})")
+        i = self.count
+        self.step[i] = step
+        self.N_pot[i] = model.N_pot
+        self.sigma[i] = model.sigma
+        self.phi[i] = model.phi
+        self.rho[i] = model.rho
+        self.count += 1
+
+    def close(self) -> None:
+        """
+        Vide les tampons sur disque et tronque les tableaux aux instantanés écrits
+
+        Sans effet si le writer est déjà fermé (les tableaux ont été libérés).
+        """
+        if self.closed:
+            return
+        self.closed = True
+        for name in ("step", "N_pot", "sigma", "phi", "rho"):
+            arr = getattr(self, name)
+            arr.flush()
+            if self.count < len(arr):
+                # Réécriture compacte (les lignes non utilisées sont abandonnées)
+                data = np.array(arr[: self.count])
+                del arr
+                setattr(self, name, None)
+                np.save(os.path.join(self.directory, f"{name}.npy"), data)
+
+        print(f"{self.count} instantanés enregistrés dans {self.directory}")
@@ -1,12 +1,27 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-import numpy as np
-from matplotlib.colors import hsv_to_rgb
+import os
+import sys
+
+import matplotlib
+
+# Exécution sans affichage (batch, serveur) : backend non interactif Agg
+if (
+    sys.platform.startswith("linux")
+    and "MPLBACKEND" not in os.environ
+    and not os.environ.get("DISPLAY")
+    and not os.environ.get("WAYLAND_DISPLAY")
+):
+    matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import networkx as nx  # noqa: E402
+import numpy as np  # noqa: E402
+from matplotlib.collections import LineCollection  # noqa: E402
+from matplotlib.colors import hsv_to_rgb  # noqa: E402
 
 
 class Plotter:
     """
-    Visualisation du modèle WB avec matplotlib et NetworkX
+    Visualisation du modèle WB avec matplotlib (collections dessinées directement)
     """
 
     def __init__(self, figsize=(10, 8)):
@@ -17,90 +32,142 @@ class Plotter:
             figsize (tuple): Taille de la figure matplotlib
         """
         self.figsize = figsize
-
-    def plot_graph(self, model, ax=None, show=True, save_path=None, highlight_ts=False):
+        # Figure réutilisée d'un appel de plot_graph à l'autre
+        self._fig = None
+        self._ax = None
+        # Positions calculées par graphe NetworkX : id(G) -> (nombre de nœuds, pos)
+        self._pos_cache = {}
+
+    def plot_graph(
+        self, model, ax=None, show=True, save_path=None, highlight_ts=False, dpi=300
+    ):
         """
         Visualise le graphe avec les champs ρ, φ, σ
 
         Args:
             model (WBModel): Instance du modèle WB
-            ax (matplotlib.axes.Axes, optional): Axes matplotlib existants
+            ax (matplotlib.axes.Axes, optional): Axes matplotlib existants ; sinon
+                la figure du plotter est réutilisée (et effacée) à chaque appel
             show (bool): Afficher la figure
             save_path (str, optional): Chemin pour sauvegarder l'image
             highlight_ts (bool): Mettre en évidence les liens TS
+            dpi (int): Résolution de l'image sauvegardée (150 suffit pour les
+                instantanés intermédiaires)
 
         Returns:
             matplotlib.figure.Figure: Figure matplotlib
         """
-        # Création de la figure si nécessaire
+        # Création de la figure au premier appel (ou si elle a été fermée),
+        # puis simple effacement des axes aux appels suivants
         if ax is None:
-            fig, ax = plt.subplots(figsize=self.figsize)
+            if self._fig is None or not plt.fignum_exists(self._fig.number):
+                self._fig, self._ax = plt.subplots(figsize=self.figsize)
+            else:
+                self._ax.clear()
+            fig, ax = self._fig, self._ax
         else:
             fig = ax.figure
 
         # Récupération du graphe
         G = model.graph.graph
 
-        # Positions des nœuds
-        pos = nx.get_node_attributes(G, "pos")
-        if not pos:
-            # Si les positions ne sont pas définies, utiliser un layout force-directed
-            pos = nx.spring_layout(G)
+        # Ordre des nœuds (précalculé par RP2Graph) ; les identifiants, contigus,
+        # indexent les champs et les positions
+        node_ids = getattr(model.graph, "node_ids", None)
+        if node_ids is None:
+            node_ids = np.fromiter(G.nodes, dtype=np.int64)
+
+        # Positions des nœuds, sous forme de tableau (N, 2)
+        pos_arr = getattr(model.graph, "pos", None)
+        if pos_arr is None or len(pos_arr) != len(node_ids):
+            # Calculées une fois par graphe (recalculées si ses nœuds changent)
+            cached = self._pos_cache.get(id(G))
+            if cached is not None and cached[0] == len(G):
+                pos_arr = cached[1]
+            else:
+                pos = nx.get_node_attributes(G, "pos")
+                if not pos:
+                    # Positions non définies : layout force-directed
+                    pos = nx.spring_layout(G, seed=0)
+                pos_arr = np.empty((len(node_ids), 2), dtype=np.float64)
+                pos_arr[node_ids] = [pos[n] for n in node_ids.tolist()]
+                self._pos_cache[id(G)] = (len(G), pos_arr)
 
         # Préparation des couleurs basées sur φ (phase) et tailles basées sur ρ (densité)
-        node_colors = []
-        node_sizes = []
-
-        for node in G.nodes():
-            # Couleur basée sur la phase (φ) pour la teinte
-            phi = model.phi.get(node, 0)
-            hue = phi / (2 * np.pi)  # Normalisation entre 0 et 1
-
-            # Saturation basée sur ρ
-            rho = model.rho.get(node, 0)
-            saturation = min(1.0, max(0.2, rho))
-
-            # Luminosité basée sur σ
-            sigma = model.sigma.get(node, 0)
-            value = 0.7 if sigma > 0 else 0.4
-
-            # Conversion HSV vers RGB
-            rgb_color = hsv_to_rgb((hue, saturation, value))
-            node_colors.append(rgb_color)
-
-            # Taille basée sur ρ
-            node_sizes.append(100 + 200 * rho)
-
-        # Dessin des nœuds
-        nx.draw_networkx_nodes(
-            G, pos, node_color=node_colors, node_size=node_sizes, alpha=0.8, ax=ax
+        phi = model.phi[node_ids]
+        rho = model.rho[node_ids]
+        sigma = model.sigma[node_ids]
+
+        # Couleurs HSV calculées en bloc puis converties en RGB en un seul appel :
+        # teinte = phase φ normalisée, saturation = ρ bornée, luminosité = σ
+        hue = phi / (2 * np.pi)
+        saturation = np.clip(rho, 0.2, 1.0)
+        value = np.where(sigma > 0, 0.7, 0.4)
+        node_colors = hsv_to_rgb(np.stack([hue, saturation, value], axis=1))
+
+        # Taille basée sur ρ
+        node_sizes = 100 + 200 * rho
+
+        # Dessin des nœuds (une seule collection)
+        ax.scatter(
+            pos_arr[node_ids, 0],
+            pos_arr[node_ids, 1],
+            s=node_sizes,
+            c=node_colors,
+            alpha=0.8,
+            zorder=2,
         )
 
-        # Dessin des liens
-        if highlight_ts and hasattr(model.graph, "get_ts_links"):
-            # Récupérer les liens TS
-            ts_links = model.graph.get_ts_links()
-            normal_links = [
-                (u, v)
-                for u, v in G.edges()
-                if (u, v) not in ts_links and (v, u) not in ts_links
-            ]
-
+        # Liens sous forme de tableaux, lus dans le CSR du graphe s'il existe
+        if hasattr(model.graph, "get_edge_arrays"):
+            u, v, is_ts = model.graph.get_edge_arrays()
+        else:
+            edges = list(G.edges(data="is_ts", default=False))
+            u = np.array([e[0] for e in edges], dtype=np.int64)
+            v = np.array([e[1] for e in edges], dtype=np.int64)
+            is_ts = np.array([bool(e[2]) for e in edges], dtype=bool)
+        # Segments (E, 2, 2) : extrémités de chaque lien
+        segments = np.stack([pos_arr[u], pos_arr[v]], axis=1)
+
+        # Dessin des liens, rastérisés dans les sorties vectorielles (PDF/SVG)
+        edge_style = {"zorder": 1, "rasterized": True}
+        if highlight_ts:
             # Dessiner les liens normaux
-            nx.draw_networkx_edges(
-                G, pos, edgelist=normal_links, width=0.5, alpha=0.5, ax=ax
+            ax.add_collection(
+                LineCollection(
+                    segments[~is_ts],
+                    colors="k",
+                    linewidths=0.5,
+                    alpha=0.5,
+                    **edge_style,
+                )
             )
 
             # Dessiner les liens TS en rouge et plus épais
-            nx.draw_networkx_edges(
-                G, pos, edgelist=ts_links, width=1.5, alpha=0.7, edge_color="red", ax=ax
+            ax.add_collection(
+                LineCollection(
+                    segments[is_ts],
+                    colors="red",
+                    linewidths=1.5,
+                    alpha=0.7,
+                    **edge_style,
+                )
             )
         else:
             # Dessiner tous les liens sans distinction
-            nx.draw_networkx_edges(G, pos, width=0.5, alpha=0.5, ax=ax)
+            ax.add_collection(
+                LineCollection(
+                    segments, colors="k", linewidths=0.5, alpha=0.5, **edge_style
+                )
+            )
+        # Marge de 5 % autour des nœuds (même cadrage que NetworkX)
+        lo, hi = pos_arr.min(axis=0), pos_arr.max(axis=0)
+        pad = 0.05 * (hi - lo)
+        ax.update_datalim([lo - pad, hi + pad])
+        ax.autoscale_view()
 
         # Paramètres de la figure
-        ax.set_title(f"Graphe RP2 - {len(G.nodes())} nœuds")
+        ax.set_title(f"Graphe RP2 - {len(node_ids)} nœuds")
         ax.set_axis_off()
 
         # Légende
@@ -117,7 +184,7 @@ class Plotter:
 
         # Sauvegarde si demandée
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches="tight")
+            fig.savefig(save_path, dpi=dpi, bbox_inches="tight")
             print(f"Figure sauvegardée dans {save_path}")
 
         # Affichage
@@ -132,7 +199,8 @@ class Plotter:
         Visualise l'évolution des statistiques du modèle WB
 
         Args:
-            history: Liste des statistiques pour chaque étape
+            history: Liste des statistiques pour chaque étape, ou tableau
+                structuré (cf. Logger.stats_array)
             ax: Axes matplotlib (optionnel)
             show: Afficher la figure
             save_path: Chemin pour sauvegarder la figure
@@ -145,13 +213,27 @@ class Plotter:
         else:
             fig = ax.figure
 
-        # Extraction des données
-        steps = [stat["step"] for stat in history]
-        active = [stat["active"] for stat in history]
-        n_pot = [stat["N_pot"] for stat in history]
-        lambda_vac = [
-            stat.get("Λ_vac", 1.0) for stat in history
-        ]  # Nouveau paramètre Λ_vac
+        n = len(history)
+        if isinstance(history, np.ndarray) and history.dtype.names:
+            # Tableau structuré : accès direct aux colonnes
+            steps = history["step"]
+            active = history["active_count"]
+            n_pot = history["N_pot"]
+            if "Λ_vac" in history.dtype.names:
+                lambda_vac = history["Λ_vac"]
+            else:
+                lambda_vac = np.ones(n)
+        else:
+            # Extraction des données en une seule passe, dans des tableaux préalloués
+            steps = np.empty(n, dtype=np.int64)
+            active = np.empty(n, dtype=np.int64)
+            n_pot = np.empty(n, dtype=np.float64)
+            lambda_vac = np.empty(n, dtype=np.float64)  # Nouveau paramètre Λ_vac
+            for i, stat in enumerate(history):
+                steps[i] = stat["step"]
+                active[i] = stat["active"]
+                n_pot[i] = stat["N_pot"]
+                lambda_vac[i] = stat.get("Λ_vac", 1.0)
 
         # Création d'un axe secondaire pour N_pot
         ax2 = ax.twinx()